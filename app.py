@@ -1,81 +1,128 @@
-from flask import Flask, render_template, request, send_file
+from flask import Flask, render_template, request, send_file, jsonify, Response, stream_with_context, g
 import os
 import json
-from tradingview_ta_v2_fetcher import run_ta_analysis
-from cot_fetcher_custom import run_cot_analysis
+import time
+import cProfile
+from modules.utils.job_queue import JobQueue
+from modules.utils.metrics import HTTP_SECONDS, profile_call, profile_stats, recent_spans, render
+from modules.utils.output_writer import content_type
+from modules.utils.summary import TA_TIMEFRAMES, get_summary, render_summary
+from modules.utils.symbol_registry import SYMBOLS
 
 app = Flask(__name__)
 OUTPUT_FOLDER = "output_files"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-def load_summary(filepath):
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Summary za TA fajl (po timeframeovima)
-        if "1m" in data:
-            summary_html = "<ul>"
-            for tf, content in data.items():
-                if isinstance(content, dict) and "summary" in content:
-                    rec = content["summary"].get("RECOMMENDATION", "N/A")
-                    summary_html += f"<li><strong>{tf}</strong>: {rec}</li>"
-            summary_html += "</ul>"
-            return summary_html
-
-        # Summary za COT fajl – poboljšan prikaz
-        elif "entries" in data and len(data["entries"]) > 0:
-            entry = data["entries"][0]
-            market = entry["market"]
-            oi = entry["open_interest"]
-            rows = ""
-
-            for group in entry["groups"]:
-                g = group["group"]
-                net = group["analysis"].get("net", 0)
-                dom = group["analysis"].get("dominance", "-")
-                alert = group["analysis"].get("alert_level", "-")
-                long_pct = group["percentages"].get("long_pct", 0)
-                short_pct = group["percentages"].get("short_pct", 0)
-                traders = group.get("traders", 0)
-
-                emoji_dom = "🟢" if dom == "bullish" else "🔴" if dom == "bearish" else "⚪"
-                emoji_alert = "🔴" if alert == "high" else "🟠" if alert == "medium" else "🟢"
-
-                rows += f"""
-                <tr>
-                    <td>{g}</td>
-                    <td style='text-align:right;'>{net:+}</td>
-                    <td>{emoji_dom} {dom.capitalize()}</td>
-                    <td>{emoji_alert} {alert.capitalize()}</td>
-                    <td>{long_pct:.1f}%</td>
-                    <td>{short_pct:.1f}%</td>
-                    <td>{traders}</td>
-                </tr>
-                """
-
-            return f"""
-            <p><strong>📌 Tržište:</strong> {market}<br><strong>📅 Open interest:</strong> {oi}</p>
-            <table style="border-collapse: collapse; width: 100%; font-size: 14px;">
-                <thead style="background-color: #f3f4f6;">
-                    <tr>
-                        <th style='text-align:left; padding: 8px; border: 1px solid #ccc;'>Grupa</th>
-                        <th style='text-align:right; padding: 8px; border: 1px solid #ccc;'>Net pozicija</th>
-                        <th style='text-align:left; padding: 8px; border: 1px solid #ccc;'>Dominacija</th>
-                        <th style='text-align:left; padding: 8px; border: 1px solid #ccc;'>Upozorenje</th>
-                        <th style='text-align:right; padding: 8px; border: 1px solid #ccc;'>% Long</th>
-                        <th style='text-align:right; padding: 8px; border: 1px solid #ccc;'>% Short</th>
-                        <th style='text-align:right; padding: 8px; border: 1px solid #ccc;'>Broj Trgovaca</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                </tbody>
-            </table>
-            """
-
-    except Exception as e:
-        return f"<p><em>⚠️ Ne mogu učitati sažetak: {str(e)}</em></p>"
+# 🚀 Fetcheri (tradingview_ta, requests, numpy, pandas) se učitavaju tek pri prvom poslu,
+# pa gunicorn worker diže samo Flask i lagane module
+# emit(event, data) je napredak posla; po simbolu ga šalje samo TA (COT i spojeni mod javljaju samo kraj)
+def run_ta_analysis(symbols_list, output_folder, emit=None):
+    from tradingview_ta_v2_fetcher import run_ta_analysis
+    on_symbol = (lambda label, out_path: emit("symbol", symbol_event(label, out_path))) if emit else None
+    return run_ta_analysis(symbols_list, output_folder, on_symbol=on_symbol)
+
+def run_cot_analysis(symbols_list, output_folder, emit=None):
+    from cot_fetcher_custom import run_cot_analysis
+    return run_cot_analysis(symbols_list, output_folder)
+
+def run_combined_analysis(symbols_list, output_folder, emit=None):
+    from combined_fetcher import run_combined_analysis
+    return run_combined_analysis(symbols_list, output_folder)
+
+# 🧵 Pozadinski poslovi – request samo prijavi posao i odmah vrati job id
+JOB_QUEUE = JobQueue(max_workers=int(os.environ.get("JOB_WORKERS", "4")))
+ANALYSES = {
+    "ta": run_ta_analysis,
+    "cot": run_cot_analysis,
+    # TA + COT paralelno, jedan spojeni fajl po simbolu
+    "combined": run_combined_analysis,
+}
+
+# 🔬 ENABLE_PROFILING=1 → ?profile=1 na bilo kojem zahtjevu snima cProfile (i profil pozadinskog posla)
+PROFILING = os.environ.get("ENABLE_PROFILING") == "1"
+PROFILE_FOLDER = os.path.join(OUTPUT_FOLDER, "profiles")
+
+# ⏰ Pre-warm TA/COT u pozadini (samo jedan worker dobije lock)
+if os.environ.get("ENABLE_SCHEDULER") == "1":
+    from scheduler import start_background
+    start_background()
+
+def parse_symbols(raw):
+    """Unos iz forme → kanonska imena (EURUSD, eur-usd, EU → EUR/USD); nepoznati ostaju kako su upisani."""
+    return [SYMBOLS.canonical(s) or s.strip().upper() for s in raw.split(",") if s.strip()]
+
+def download_link(path):
+    return "/" + os.path.relpath(path, start=".").replace("\\", "/")
+
+def symbol_event(label, out_path):
+    """Red TA tabele za stream: preporuka po timeframeu (TA_TIMEFRAMES) + link na fajl."""
+    return {
+        "symbol": label,
+        "download_link": download_link(out_path),
+        "timeframes": get_summary(out_path)["timeframes"],
+    }
+
+def analysis_job(mode, symbols_list, profile=False):
+    """Posao koji radi u pozadini: analiza + sažetak za prikaz."""
+    def run(emit=None):
+        result = ANALYSES[mode](symbols_list, OUTPUT_FOLDER, emit)
+        if result is None or not os.path.exists(result.path):
+            raise RuntimeError("Fajl nije generisan ili ne postoji.")
+        summary = render_summary(result.summary)
+        if not summary:
+            # npr. COT bez pronađenog tržišta – posao je greška, ne "done" s praznim sažetkom
+            raise RuntimeError("Nema podataka za simbol.")
+        return {
+            "output_path": result.path,
+            "download_link": download_link(result.path),
+            # Svi snimljeni fajlovi (npr. jedan spojeni TA + COT po simbolu) u istom odgovoru
+            "download_links": [download_link(path) for path in result.outputs],
+            "summary": summary,
+        }
+
+    def run_profiled(emit=None):
+        result, report = profile_call(lambda: run(emit))
+        result["profile"] = report
+        return result
+    return run_profiled if profile else run
+
+def submit_job(mode, symbols_list):
+    return JOB_QUEUE.submit(mode, symbols_list, analysis_job(mode, symbols_list, profile=wants_profile()))
+
+def wants_profile():
+    if not PROFILING:
+        return False
+    flag = request.values.get("profile") or (request.get_json(silent=True) or {}).get("profile")
+    return str(flag).lower() in ("1", "true")
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    g.profiler = None
+    if wants_profile():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unknown"
+    HTTP_SECONDS.observe(time.perf_counter() - g.started,
+                         method=request.method, endpoint=endpoint, status=response.status_code)
+    if g.profiler is not None:
+        g.profiler.disable()
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        filename = f"{request.endpoint}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.txt"
+        with open(os.path.join(PROFILE_FOLDER, filename), "w", encoding="utf-8") as f:
+            f.write(profile_stats(g.profiler))
+        response.headers["X-Profile"] = f"/{OUTPUT_FOLDER}/profiles/{filename}"
+    return response
+
+@app.teardown_request
+def stop_profiler(exc):
+    # after_request se ne poziva kod neuhvaćenog izuzetka – profiler ne smije ostati uključen
+    profiler = g.get("profiler")
+    if profiler is not None:
+        profiler.disable()
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -86,29 +133,114 @@ def index():
         symbols = request.form.get("symbols", "")
         mode = request.form.get("mode", "ta")
         if symbols:
-            symbols_list = [s.strip().upper() for s in symbols.split(",")]
+            symbols_list = parse_symbols(symbols)
 
-            if mode == "ta":
-                output_path = run_ta_analysis(symbols_list, OUTPUT_FOLDER)
-            elif mode == "cot":
-                output_path = run_cot_analysis(symbols_list, OUTPUT_FOLDER)
-            else:
+            if mode not in ANALYSES:
                 return "Nepoznat mod", 400
 
-            if output_path and os.path.exists(output_path):
-                summary = load_summary(output_path)
-                rel_path = os.path.relpath(output_path, start=".")
-                return render_template("index.html", summary=summary, download_link="/" + rel_path.replace("\\", "/"))
-            else:
-                return "Fajl nije generisan ili ne postoji.", 500
-
-    return render_template("index.html", summary=summary, download_link=download_link)
+            job = submit_job(mode, symbols_list)
+            return render_template("index.html", summary=summary, download_link=download_link,
+                                   job_id=job.id, symbols=SYMBOLS.labels())
+
+    return render_template("index.html", summary=summary, download_link=download_link, symbols=SYMBOLS.labels())
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    data = request.get_json(silent=True) or request.form
+    symbols = data.get("symbols", "")
+    if isinstance(symbols, list):
+        symbols = ",".join(symbols)
+    mode = data.get("mode", "ta")
+    symbols_list = parse_symbols(symbols)
+    if not symbols_list:
+        return jsonify({"error": "Nema simbola"}), 400
+    if mode not in ANALYSES:
+        return jsonify({"error": "Nepoznat mod"}), 400
+
+    job = submit_job(mode, symbols_list)
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Posao ne postoji"}), 404
+    return jsonify(job)
+
+@app.route("/symbols")
+def symbols():
+    """Prijedlozi simbola za formu: ?q=eu → prefiks/približno poklapanje."""
+    query = request.args.get("q", "")
+    return jsonify({"symbols": SYMBOLS.suggest(query)})
+
+@app.route("/screen", methods=["GET", "POST"])
+def screen():
+    """Screening svih simbola: ?filter=RSI@1h < 30 and REC@4h >= BUY&rank=ADX@1d&limit=20&order=desc."""
+    from tradingview_ta_v2_fetcher import TA_MATRIX
+    from modules.utils.ta_screener import parse_request
+
+    values = request.get_json(silent=True) or request.values
+    try:
+        params = parse_request(values)
+        # Fajlovi koje je u međuvremenu snimio drugi proces (scheduler) – čitaju se samo promijenjeni
+        TA_MATRIX.sync(OUTPUT_FOLDER, resolve=SYMBOLS.canonical)
+        return jsonify(TA_MATRIX.screen(**params))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+STREAM_POLL_SECONDS = 0.2
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route("/jobs/<job_id>/stream")
+def job_stream(job_id):
+    """SSE: napredak posla iz JOB_QUEUE – TA red po simbolu čim je snimljen, pa kraj posla.
+
+    Posao radi u poolu (i može pripadati drugom workeru); stream samo prati njegove događaje.
+    """
+    if JOB_QUEUE.get(job_id) is None:
+        return jsonify({"error": "Posao ne postoji"}), 404
+
+    def generate():
+        yield sse("start", {"job_id": job_id, "timeframes": TA_TIMEFRAMES})
+        sent = 0
+        while True:
+            job = JOB_QUEUE.get(job_id)
+            if job is None:
+                yield sse("error", {"error": "Posao ne postoji"})
+                return
+            for item in job["events"][sent:]:
+                yield sse(item["event"], item["data"])
+            sent = len(job["events"])
+            if job["status"] == "done":
+                links = job["result"]["download_links"]
+                yield sse("done", {"count": len(links), "download_links": links})
+                return
+            if job["status"] == "error":
+                yield sse("error", {"error": job["error"] or "Greška"})
+                return
+            time.sleep(STREAM_POLL_SECONDS)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus metrike ovog procesa (latencija, keš, upstream greške, parsirani bajtovi)."""
+    return Response(render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/metrics/spans")
+def metrics_spans():
+    limit = request.args.get("limit", 100, type=int)
+    return jsonify({"spans": recent_spans(limit)})
 
 @app.route("/output_files/<path:filename>")
 def download_file(filename):
     path = os.path.join("output_files", filename)
     if os.path.exists(path):
-        return send_file(path, as_attachment=True)
+        # conditional=True → ETag/304 i Range (206) za velike izvještaje
+        return send_file(path, mimetype=content_type(path), as_attachment=True, conditional=True)
     return "Fajl ne postoji", 404
 
 if __name__ == "__main__":
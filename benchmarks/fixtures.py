@@ -0,0 +1,156 @@
+# 📁 benchmarks/fixtures.py
+"""Fixture za benchmark: snimanje pravih odgovora ili generisanje determinističkih zamjena.
+
+    python benchmarks/fixtures.py record       # CFTC stranice + TradingView scanner (treba mreža)
+    python benchmarks/fixtures.py synthesize   # offline, isti oblik kao snimljeni podaci
+
+Fixture se commitaju, pa svi benchmarki rade nad istim ulazom.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.replay_server import CFTC_DIR, TV_FIXTURE
+
+# Izvori koji se snimaju/generišu (podskup cot_sources_config.json)
+CFTC_SOURCES = ["financial_lf", "deacmelf", "ag_lf", "other_lf"]
+TIMEFRAMES = ["1m", "5m", "15m", "30m", "1h", "4h", "1d"]
+
+MARKETS = [
+    "EURO FX - CHICAGO MERCANTILE EXCHANGE", "BRITISH POUND - CHICAGO MERCANTILE EXCHANGE",
+    "JAPANESE YEN - CHICAGO MERCANTILE EXCHANGE", "SWISS FRANC - CHICAGO MERCANTILE EXCHANGE",
+    "CANADIAN DOLLAR - CHICAGO MERCANTILE EXCHANGE", "AUSTRALIAN DOLLAR - CHICAGO MERCANTILE EXCHANGE",
+    "NEW ZEALAND DOLLAR - CHICAGO MERCANTILE EXCHANGE", "GOLD - COMMODITY EXCHANGE INC.",
+    "U.S. DOLLAR INDEX - ICE FUTURES U.S.", "BITCOIN - CHICAGO MERCANTILE EXCHANGE",
+    "WHEAT-SRW - CHICAGO BOARD OF TRADE", "CORN - CHICAGO BOARD OF TRADE",
+    "SOYBEANS - CHICAGO BOARD OF TRADE", "CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE",
+]
+
+
+# 🎲 Sintetički CFTC "long format" – isti raspored redova kao prave stranice
+def synthetic_page(seed, markets=60):
+    rnd = random.Random(seed)
+
+    def nums(k, lo, hi):
+        return "  ".join(f"{rnd.randint(lo, hi):,}" for _ in range(k))
+
+    lines = ["<html><head><title>Commitments of Traders - Futures Only</title></head><body>", "<pre>"]
+    for i in range(markets):
+        market = MARKETS[i % len(MARKETS)] + ("" if i < len(MARKETS) else f" #{i}")
+        lines += [
+            "-" * 110,
+            f"{market:<90}Code-{rnd.randint(10000, 99999):06d}",
+            "FUTURES ONLY POSITIONS OF TRADERS AS OF June 24, 2025",
+            "  NON-COMMERCIAL         :   COMMERCIAL    :      TOTAL       :  NONREPORTABLE",
+            f"          :   (CONTRACTS OF 100,000)                               Open Interest is {rnd.randint(10000, 900000):>10,}",
+            "Positions",
+            "    " + nums(15, 0, 200000),
+            "",
+            f"Changes from:       June 17, 2025                                Total Change is: {rnd.randint(-5000, 5000):>8,}",
+            "    " + "  ".join(f"{rnd.randint(-9000, 9000):,}" for _ in range(15)),
+            "",
+            "Percent of Open Interest Represented by Each Category of Trader",
+            "    " + "  ".join(f"{rnd.uniform(0, 60):.1f}" for _ in range(15)),
+            "",
+            f"Number of Traders in Each Category                                Total Traders: {rnd.randint(50, 400):>6}",
+            "    " + "  ".join(str(rnd.randint(3, 120)) for _ in range(12)),
+            "",
+            f"Percent of Open Interest Held by the Largest 4 Traders (Gross): {rnd.uniform(5, 60):.1f}% Long, {rnd.uniform(5, 60):.1f}% Short",
+            f"Percent of Open Interest Held by the Largest 8 Traders (Gross): {rnd.uniform(5, 80):.1f}% Long, {rnd.uniform(5, 80):.1f}% Short",
+        ] + [" " * 10 + ":" for _ in range(rnd.randint(30, 45))]
+    lines += ["</pre>", "</body></html>"]
+    return "\n".join(lines) + "\n"
+
+def synthetic_values(rnd, indicators, price):
+    values = []
+    for name in indicators:
+        if name.startswith("Recommend"):
+            values.append(round(rnd.uniform(-1, 1), 4))
+        elif name.startswith("Rec."):
+            values.append(rnd.choice([-1, 0, 1]))
+        elif name.startswith(("RSI", "Stoch", "UO", "ADX")):
+            values.append(round(rnd.uniform(5, 95), 4))
+        elif name.startswith(("CCI", "W.R", "AO", "Mom", "MACD", "BBPower", "change")):
+            values.append(round(rnd.uniform(-50, 50), 6))
+        elif name == "volume":
+            values.append(rnd.randint(0, 100000))
+        else:
+            values.append(round(price * rnd.uniform(0.98, 1.02), 6))
+    return values
+
+def tickers():
+    from modules.utils.symbol_registry import SYMBOLS
+    for label, info in SYMBOLS.config().items():
+        symbol = info["map"]["tradingview_ta_v2"]
+        exchanges = info.get("exchanges", []) or ["OANDA"]
+        yield f"{exchanges[0]}:{symbol}", info.get("screener", "forex")
+
+def synthesize(seed=17):
+    from tradingview_ta.main import TradingView
+
+    os.makedirs(CFTC_DIR, exist_ok=True)
+    for i, source_id in enumerate(CFTC_SOURCES):
+        path = os.path.join(CFTC_DIR, f"{source_id}.htm")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_page(seed + i))
+        print(f"🧪 {path}")
+
+    rnd = random.Random(seed)
+    indicators = TradingView.indicators
+    responses = {}
+    for ticker, _ in tickers():
+        price = rnd.uniform(0.5, 2000)
+        responses[ticker] = {tf: synthetic_values(rnd, indicators, price) for tf in TIMEFRAMES}
+    write_tv_fixture(indicators, responses, "synthetic")
+
+
+# 📼 Snimanje pravih odgovora
+def write_tv_fixture(indicators, responses, origin):
+    with open(TV_FIXTURE, "w", encoding="utf-8") as f:
+        json.dump({"origin": origin, "columns": indicators, "responses": responses}, f, separators=(",", ":"))
+    print(f"🧪 {TV_FIXTURE} ({len(responses)} tickera)")
+
+def record():
+    import requests
+    from tradingview_ta.main import TradingView
+
+    with open(os.path.join(ROOT, "sources", "cot_sources_config.json"), "r", encoding="utf-8") as f:
+        sources = json.load(f)
+    os.makedirs(CFTC_DIR, exist_ok=True)
+    for source_id in CFTC_SOURCES:
+        response = requests.get(sources[source_id], headers={"User-Agent": "Mozilla/5.0"}, timeout=(5, 60))
+        response.raise_for_status()
+        with open(os.path.join(CFTC_DIR, f"{source_id}.htm"), "wb") as f:
+            f.write(response.content)
+        print(f"📼 {source_id}: {len(response.content)} B")
+
+    indicators = TradingView.indicators
+    by_screener = {}
+    for ticker, screener in tickers():
+        by_screener.setdefault(screener.lower(), []).append(ticker)
+    responses = {}
+    for screener, symbols in by_screener.items():
+        for tf in TIMEFRAMES:
+            data = TradingView.data(symbols, tf, indicators)
+            response = requests.post(f"{TradingView.scan_url}{screener}/scan", json=data, timeout=10)
+            response.raise_for_status()
+            for row in response.json()["data"]:
+                responses.setdefault(row["s"], {})[tf] = row["d"]
+    write_tv_fixture(indicators, responses, "recorded")
+
+
+# ▶️ MAIN
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["record", "synthesize"])
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    if args.action == "record":
+        record()
+    else:
+        synthesize(args.seed)
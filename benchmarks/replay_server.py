@@ -0,0 +1,152 @@
+# 📁 benchmarks/replay_server.py
+"""Lokalni zamjenski server za benchmark: TradingView scanner + CFTC stranice iz fixtura.
+
+    python benchmarks/replay_server.py --port 8765 --latency-ms 120 --jitter-ms 40
+
+POST /<screener>/scan vraća snimljene "d" vrijednosti za tražene tickere i interval,
+GET /cftc/<source_id>.htm vraća snimljenu CFTC stranicu. Kašnjenje se dodaje po zahtjevu.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+TV_FIXTURE = os.path.join(FIXTURES_DIR, "tv_scanner.json")
+CFTC_DIR = os.path.join(FIXTURES_DIR, "cftc")
+
+# Sufiks kolone ("RSI|60") → interval iz TradingView.data
+SUFFIX_INTERVALS = {
+    "1": "1m", "5": "5m", "15": "15m", "30": "30m", "60": "1h",
+    "120": "2h", "240": "4h", "": "1d", "1W": "1W", "1M": "1M",
+}
+
+
+def load_tv_fixture(path=TV_FIXTURE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def column_interval(columns):
+    first = columns[0] if columns else ""
+    suffix = first.split("|", 1)[1] if "|" in first else ""
+    return SUFFIX_INTERVALS.get(suffix, "1d")
+
+
+class ReplayServer:
+    """ThreadingHTTPServer u pozadinskom threadu; brojači zahtjeva za izvještaj benchmarka."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0,
+                 tv_fixture=TV_FIXTURE, cftc_dir=CFTC_DIR):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.tv = load_tv_fixture(tv_fixture)
+        self.cftc_dir = cftc_dir
+        self.requests = 0
+        # Postavi npr. na 429 ili 503 da se simulira nezdrav upstream
+        self.fail_status = None
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        wait = self.latency + random.uniform(0, self.jitter)
+        if wait > 0:
+            time.sleep(wait)
+
+    def scan(self, body):
+        tickers = body.get("symbols", {}).get("tickers", [])
+        columns = body.get("columns", [])
+        interval = column_interval(columns)
+        data = []
+        for ticker in tickers:
+            values = self.tv["responses"].get(ticker, {}).get(interval)
+            if values is not None:
+                data.append({"s": ticker, "d": values[:len(columns)]})
+        return {"totalCount": len(data), "data": data}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Keep-alive + zasebno pisanje headera i tijela → Nagle/delayed ACK (~40 ms po zahtjevu)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.delay()
+                if server.fail_status:
+                    return self._send(server.fail_status, b"{}", "application/json")
+                if not self.path.endswith("/scan"):
+                    return self._send(404, b"{}", "application/json")
+                payload = json.dumps(server.scan(body)).encode()
+                self._send(200, payload, "application/json")
+
+            def do_GET(self):
+                server.delay()
+                if server.fail_status:
+                    return self._send(server.fail_status, b"", "text/plain")
+                name = os.path.basename(self.path.split("?", 1)[0])
+                path = os.path.join(server.cftc_dir, name)
+                if not self.path.startswith("/cftc/") or not os.path.isfile(path):
+                    return self._send(404, b"not found", "text/plain")
+                with open(path, "rb") as f:
+                    self._send(200, f.read(), "text/html")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def cftc_sources(self):
+        """source_id → lokalni URL, u formatu cot_sources_config.json."""
+        return {
+            name.rsplit(".", 1)[0]: f"{self.url}cftc/{name}"
+            for name in sorted(os.listdir(self.cftc_dir)) if name.endswith(".htm")
+        }
+
+
+# ▶️ MAIN – samostalni server (npr. za ručno testiranje appa protiv replaya)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = ReplayServer(port=args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    print(f"🎞️ Replay server: {server.url} (TradingView.scan_url = '{server.url}')")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+        sys.exit(0)
@@ -0,0 +1,407 @@
+# 📁 benchmarks/run_benchmarks.py
+"""Offline benchmarki nad fixturama (benchmarks/fixtures) i replay serverom.
+
+    python benchmarks/run_benchmarks.py                       # svi, poređenje s baseline.json
+    python benchmarks/run_benchmarks.py --only cot_parse,ta_run_batch --repeat 10
+    python benchmarks/run_benchmarks.py --latency-ms 150 --concurrency 16
+    python benchmarks/run_benchmarks.py --save-baseline       # trenutni rezultat postaje baseline
+
+Svaki run se snima u benchmarks/results/<vrijeme>-<git rev>.json. Ako je medijan
+nekog benchmarka sporiji od poređenog runa za više od --threshold, izlaz je 1.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import contextlib
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+
+# Moduli repoa čitaju relativne putanje (sources/...) pri importu
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from benchmarks.replay_server import CFTC_DIR, ReplayServer
+from modules.cot.content_cache import ContentCache
+from modules.cot.pre_extractor import iter_cot_blocks
+from modules.utils.ta_cache import TA_CACHE
+from modules.utils.upstream import CFTC, TRADINGVIEW, TokenBucket
+import cot_fetcher_full
+import tradingview_ta_v2_fetcher
+from tradingview_ta.main import TradingView
+
+
+# 📏 Mjerenje
+def percentile(values, q):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+def describe(samples):
+    return {
+        "runs": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "p95": percentile(samples, 0.95),
+        "mean": statistics.fmean(samples),
+    }
+
+def timed(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples, info = [], {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        info = func() or {}
+        samples.append(time.perf_counter() - started)
+    result = describe(samples)
+    result.update(info)
+    if "items" in info:
+        result["items_per_s"] = info["items"] / result["median"]
+    return result
+
+
+# 🧪 Benchmarki – svaki vraća rezultat za jedan naziv
+class Context:
+    def __init__(self, args, server, workdir):
+        self.args = args
+        self.server = server
+        self.workdir = workdir
+        # Keširani CFTC fajlovi – fetcheri ih čitaju streamingom s diska (pre_extractor), ne iz stringa
+        self.pages = [
+            os.path.join(CFTC_DIR, name) for name in sorted(os.listdir(CFTC_DIR)) if name.endswith(".htm")
+        ]
+
+def bench_cot_extract(ctx):
+    """Blokovi iz <pre> regiona fajla (iter_cot_blocks) – bez parsiranja."""
+    size = sum(os.path.getsize(path) for path in ctx.pages)
+
+    def run():
+        count = sum(1 for path in ctx.pages for _ in iter_cot_blocks(path))
+        return {"items": count, "bytes": size}
+    result = timed(run, ctx.args.repeat)
+    result["mb_per_s"] = size / result["median"] / 1e6
+    return result
+
+def bench_cot_parse(ctx):
+    """parse_source nad fajlom bez baze blokova – ekstrakcija + parsiranje svih blokova, kao hladan full izvještaj."""
+    def run():
+        blocks = 0
+        for path in ctx.pages:
+            _, stats = cot_fetcher_full.parse_source(os.path.basename(path), path)
+            blocks += stats["blocks"]
+        return {"items": blocks}
+    return timed(run, ctx.args.repeat)
+
+def use_cot_cache(cache_dir):
+    cot_fetcher_full.CACHE_DIR = cache_dir
+    cot_fetcher_full.CONTENT_CACHE = ContentCache(cache_dir)
+    cot_fetcher_full.BLOCK_STORE_PATH = str(cache_dir / Path(cot_fetcher_full.BLOCK_STORE_PATH).name)
+
+def full_report_run(ctx):
+    before = ctx.server.requests
+    report = cot_fetcher_full.build_full_report(ctx.server.cftc_sources())
+    return {"items": len(report["entries"]), "upstream_requests": ctx.server.requests - before}
+
+def bench_cot_full_report_cold(ctx):
+    def run():
+        cache_dir = Path(tempfile.mkdtemp(dir=ctx.workdir))
+        use_cot_cache(cache_dir)
+        try:
+            return full_report_run(ctx)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return timed(run, ctx.args.repeat)
+
+def bench_cot_full_report_warm(ctx):
+    cache_dir = Path(tempfile.mkdtemp(dir=ctx.workdir))
+    use_cot_cache(cache_dir)
+    # warmup u timed() puni keš parsiranih rezultata
+    return timed(lambda: full_report_run(ctx), ctx.args.repeat)
+
+def ta_run(ctx, batch):
+    TA_CACHE.clear()
+    before = ctx.server.requests
+    tradingview_ta_v2_fetcher.run_ta_analysis(["ALL"], "output_files", batch=batch)
+    symbols = len(tradingview_ta_v2_fetcher.resolve_symbols(["ALL"]))
+    return {"items": symbols, "upstream_requests": ctx.server.requests - before}
+
+def bench_ta_run_batch(ctx):
+    return timed(lambda: ta_run(ctx, True), ctx.args.repeat)
+
+def bench_ta_run_per_symbol(ctx):
+    return timed(lambda: ta_run(ctx, False), ctx.args.repeat)
+
+@contextlib.contextmanager
+def serve_app():
+    """app.py na pravom HTTP serveru u threadu – bazni URL."""
+    from werkzeug.serving import make_server
+    import app as web
+
+    httpd = make_server("127.0.0.1", 0, web.app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}"
+    finally:
+        httpd.shutdown()
+
+def client_session(local):
+    import requests
+
+    session = getattr(local, "session", None)
+    if session is None:
+        session = local.session = requests.Session()
+    return session
+
+def wait_job(session, base, job_id, poll=0.01):
+    """Status posla dok ne bude done/error – kao klijent koji čeka rezultat."""
+    while True:
+        job = session.get(f"{base}/jobs/{job_id}").json()
+        if job["status"] in ("done", "error"):
+            return job
+        time.sleep(poll)
+
+def app_load(ctx, one):
+    """one(i) → (sekunde, ok) pod --concurrency klijenata; TA keš je prazan na početku mjerenja."""
+    total = ctx.args.requests
+    with ThreadPoolExecutor(max_workers=ctx.args.concurrency) as pool:
+        list(pool.map(one, range(ctx.args.concurrency)))  # warmup
+        TA_CACHE.clear()
+        before = ctx.server.requests
+        started = time.perf_counter()
+        results = list(pool.map(one, range(total)))
+        wall = time.perf_counter() - started
+
+    result = describe([elapsed for elapsed, _ in results])
+    result.update({
+        "items": total,
+        "concurrency": ctx.args.concurrency,
+        "errors": sum(1 for _, ok in results if not ok),
+        "requests_per_s": total / wall,
+        "upstream_requests": ctx.server.requests - before,
+    })
+    return result
+
+def bench_app_index(ctx):
+    """GET / i TA posao od POST /jobs do statusa done na /jobs/<id> (pravi HTTP server u threadu)."""
+    labels = [label.replace("/", "") for label in tradingview_ta_v2_fetcher.load_config()]
+    local = threading.local()
+
+    with serve_app() as base:
+        def one(i):
+            session = client_session(local)
+            started = time.perf_counter()
+            if i % 2:
+                response = session.post(f"{base}/jobs", json={"symbols": [random.choice(labels)], "mode": "ta"})
+                ok = response.status_code == 202
+                if ok:
+                    ok = wait_job(session, base, response.json()["job_id"])["status"] == "done"
+            else:
+                ok = session.get(f"{base}/").status_code == 200
+            return time.perf_counter() - started, ok
+
+        return app_load(ctx, one)
+
+def bench_app_stream(ctx):
+    """TA posao za 3 simbola preko /jobs/<id>/stream: od POST /jobs do SSE done (i do prvog simbola)."""
+    labels = [label.replace("/", "") for label in tradingview_ta_v2_fetcher.load_config()]
+    local = threading.local()
+    first = []
+
+    with serve_app() as base:
+        def one(i):
+            session = client_session(local)
+            started = time.perf_counter()
+            response = session.post(f"{base}/jobs", json={"symbols": random.sample(labels, 3), "mode": "ta"})
+            if response.status_code != 202:
+                return time.perf_counter() - started, False
+            event, ok, first_at = None, False, None
+            with session.get(f"{base}/jobs/{response.json()['job_id']}/stream", stream=True) as stream:
+                for line in stream.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "symbol" and first_at is None:
+                            first_at = time.perf_counter() - started
+                        if event in ("done", "error"):
+                            ok = event == "done"
+                            break
+            if first_at is not None:
+                first.append(first_at)
+            return time.perf_counter() - started, ok
+
+        result = app_load(ctx, one)
+    result["first_symbol_median"] = statistics.median(first) if first else None
+    return result
+
+def cold_start(ctx, modules):
+    """Import u novom interpreteru – koliko traje boot gunicorn workera / CLI-ja prije prvog rada."""
+    code = "; ".join(f"import {name}" for name in modules)
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        return {"items": len(modules)}
+    return timed(run, ctx.args.repeat)
+
+def bench_startup_app(ctx):
+    return cold_start(ctx, ["app"])
+
+def bench_startup_cli(ctx):
+    return cold_start(ctx, ["cot_fetcher_full", "cot_fetcher_custom", "tradingview_ta_v2_fetcher"])
+
+BENCHMARKS = {
+    "cot_extract": bench_cot_extract,
+    "cot_parse": bench_cot_parse,
+    "cot_full_report_cold": bench_cot_full_report_cold,
+    "cot_full_report_warm": bench_cot_full_report_warm,
+    "ta_run_batch": bench_ta_run_batch,
+    "ta_run_per_symbol": bench_ta_run_per_symbol,
+    "app_index": bench_app_index,
+    "app_stream": bench_app_stream,
+    "startup_app": bench_startup_app,
+    "startup_cli": bench_startup_cli,
+}
+
+
+# 💾 Rezultati i poređenje
+def git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def save_results(run):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{run['meta']['git_rev']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    return path
+
+def load_results(target):
+    if target == "latest":
+        runs = sorted(n for n in os.listdir(RESULTS_DIR) if n.endswith(".json") and n != "baseline.json")
+        if len(runs) < 2:
+            return None
+        target = os.path.join(RESULTS_DIR, runs[-2])
+    elif target == "baseline":
+        target = BASELINE
+    if not os.path.exists(target):
+        return None
+    with open(target, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(current, previous, threshold):
+    """Ispis poređenja medijana; vraća (sporiji od praga, bez poređenja)."""
+    regressions, missing = [], []
+    print(f"\n📊 Poređenje s {previous['meta']['git_rev']} ({previous['meta']['created_at']})")
+    for name, result in current["results"].items():
+        old = previous["results"].get(name)
+        if not old:
+            print(f"   {name:<24} {result['median'] * 1000:>10.2f} ms   (novo)")
+            missing.append(name)
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  ❌ regresija"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  ✅ brže"
+        print(f"   {name:<24} {old['median'] * 1000:>10.2f} → {result['median'] * 1000:>10.2f} ms  ({ratio:.2f}x){flag}")
+    return regressions, missing
+
+
+# ▶️ MAIN
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", help="zarezom odvojeni nazivi: " + ",".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=50, help="kašnjenje replay servera po zahtjevu")
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=8, help="istovremeni klijenti za app_index/app_stream")
+    parser.add_argument("--requests", type=int, default=200, help="broj zahtjeva za app_index/app_stream")
+    parser.add_argument("--compare", default="baseline", help="baseline, latest ili putanja do rezultata")
+    parser.add_argument("--threshold", type=float, default=0.15, help="dozvoljeno usporenje medijana (0.15 = 15%%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="ispis fetchera i servera tokom mjerenja")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Nepoznati benchmarki: {', '.join(unknown)}")
+
+    random.seed(0)
+    if not args.verbose:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ReplayServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    TradingView.scan_url = server.url
+    # Replay je lokalan – bez ovoga bi benchmark mjerio token bucket, a ne kod
+    for client in (TRADINGVIEW, CFTC):
+        client.bucket = TokenBucket(rate=1e6, capacity=1e6)
+    workdir = tempfile.mkdtemp(prefix="ta-bench-")
+    os.chdir(workdir)
+    ctx = Context(args, server, workdir)
+
+    results = {}
+    try:
+        for name in names:
+            print(f"⏱️ {name} …", flush=True)
+            with open(os.devnull, "w") as sink:
+                with contextlib.redirect_stdout(sys.stdout if args.verbose else sink):
+                    results[name] = BENCHMARKS[name](ctx)
+            print(f"   medijan {results[name]['median'] * 1000:.2f} ms, p95 {results[name]['p95'] * 1000:.2f} ms")
+    finally:
+        server.stop()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    run = {
+        "meta": {
+            "git_rev": git_rev(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fixtures": server.tv.get("origin", "recorded"),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    path = save_results(run)
+    print(f"💾 Rezultati: {path}")
+
+    if args.save_baseline:
+        shutil.copyfile(path, BASELINE)
+        print(f"📌 Baseline: {BASELINE}")
+        return 0
+
+    previous = load_results(args.compare)
+    if previous is None:
+        print("ℹ️ Nema prethodnog runa za poređenje.")
+        return 0
+    regressions, missing = compare(run, previous, args.threshold)
+    if regressions:
+        print(f"❌ Sporije od praga ({args.threshold:.0%}): {', '.join(regressions)}")
+    # Benchmark bez unosa u baseline-u nikad ne može pokazati regresiju – baseline treba regenerisati
+    if missing and args.compare == "baseline":
+        print(f"❌ Nema u baseline-u (pokreni --save-baseline): {', '.join(missing)}")
+    return 1 if regressions or (missing and args.compare == "baseline") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
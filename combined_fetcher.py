@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from cot_fetcher_custom import analyze_symbol, load_history, symbol_entries
+from modules.utils.output_writer import output_path, write_document
+from modules.utils.summary import AnalysisResult, combined_summary, store_summary
+from modules.utils.symbol_registry import SYMBOLS
+from tradingview_ta_v2_fetcher import BATCH_MODE, MAX_WORKERS, TA_MATRIX, iter_ta_data, iter_ta_data_batch, normalize_symbol
+
+OUTPUT_FOLDER = "output_files"
+
+# 💾 Jedini izlaz spojenog moda je <SIMBOL>_combined fajl – TA i COT fajlovi po simbolu
+# se ne pišu i COT istorija se ne dopisuje (to rade TA i COT mod)
+def collect_ta(selected_symbols, max_workers=MAX_WORKERS, batch=BATCH_MODE):
+    """{label: {tf: {summary, indicators}}}; screening matrica u memoriji se ažurira usput."""
+    fetch = iter_ta_data_batch if batch else iter_ta_data
+    results = {}
+    for label, full_data in fetch(selected_symbols, max_workers=max_workers):
+        results[label] = full_data
+        TA_MATRIX.update(label, full_data, time.time())
+    return results
+
+def collect_cot(selected_symbols):
+    """{label: COT rezultat} za simbole s mappingom; istorija svih tržišta se čita jednom."""
+    found = {}
+    for label, info in selected_symbols:
+        results = symbol_entries(label, info)
+        if results:
+            found[label] = results
+    if found:
+        load_history(found.values())
+    reports = {}
+    for label, results in found.items():
+        reports[label] = analyze_symbol(label, results, record=False)
+    return reports
+
+def merge_symbol(label, ta_data, cot_data):
+    """Jedan dokument po simbolu: TA po timeframeu + COT unosi (entries)."""
+    return {
+        "symbol": label,
+        "collected_at": datetime.now().isoformat(),
+        "ta": ta_data,
+        "cot_collected_at": cot_data["collected_at"] if cot_data else None,
+        "entries": cot_data["entries"] if cot_data else [],
+    }
+
+def run_combined_analysis(selected_input, output_dir=OUTPUT_FOLDER, max_workers=MAX_WORKERS, batch=BATCH_MODE):
+    """TA i COT za iste simbole paralelno; vraća AnalysisResult za prvi spojeni fajl (ili None).
+
+    Simboli se razriješe jednom i isti (label, config) idu u oba izvora, pa
+    ukupno trajanje prati sporiji izvor umjesto zbira oba.
+    """
+    selected_symbols = SYMBOLS.resolve(selected_input)
+    if not selected_symbols:
+        print(f"⚠️ Nepoznati simboli: {', '.join(selected_input)}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        cot_future = pool.submit(collect_cot, selected_symbols)
+        ta_future = pool.submit(collect_ta, selected_symbols, max_workers, batch)
+        ta_results, cot_results = ta_future.result(), cot_future.result()
+
+    outputs = {}
+    for label, _ in selected_symbols:
+        merged = merge_symbol(label, ta_results.get(label), cot_results.get(label))
+        path = write_document(output_path(output_dir, f"{normalize_symbol(label)}_combined"), merged)
+        outputs[path] = store_summary(path, combined_summary(merged))
+        print(f"🔗 Spojeno TA + COT: {path}")
+
+    first_path = next(iter(outputs))
+    return AnalysisResult(first_path, outputs[first_path], outputs)
+
+# ▶️ MAIN
+if __name__ == "__main__":
+    user_input = input("Unesi simbol(e) za TA + COT (ALL za sve): ").strip()
+    run_combined_analysis([s.strip() for s in user_input.split(",") if s.strip()])
@@ -1,166 +1,134 @@
-import os
-import json
-import re
+import copy
 from datetime import datetime
 from pathlib import Path
-from bs4 import BeautifulSoup
-
-# 📁 Putanje
-CONFIG_PATH = Path(__file__).resolve().parents[2] / "sources" / "symbols_config.json"
-CACHE_DIR = Path(__file__).resolve().parents[2] / "sources" / "cot_cache"
+from modules.cot.block_store import STORE_FILENAME, BlockStore
+from modules.cot.content_cache import CACHE_DIR
+from modules.cot.cot_index import CotIndex, read_block
+from modules.cot.cot_keys import market_key
+from modules.cot.cot_parser import parse_block
+from modules.utils.metrics import BYTES_PARSED, CACHE_REQUESTS, timed
+from modules.utils.output_writer import output_path, write_document
+from modules.utils.summary import AnalysisResult, cot_summary, store_summary
+from modules.utils.symbol_registry import SYMBOLS
+
+# 📁 Putanje (CACHE_DIR dijeli s cot_fetcher_full)
 OUT_DIR = Path("data/ai")
 
-# 📦 Učitaj config
+# 🗂️ Indeks header → (fajl, offset), gradi se jednom po keš fajlu
+COT_INDEX = CotIndex(CACHE_DIR)
+# 🧩 Parsirani blokovi po otisku – dijele ih svi procesi (app, CLI, full izvještaj)
+BLOCK_STORE = BlockStore(CACHE_DIR / STORE_FILENAME)
+
+# 📦 Config iz zajedničkog registra simbola
 def load_symbols_config():
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def normalize_symbol(s):
-    return s.replace("-", "/").replace(" ", "/").upper()
-
-def extract_blocks_from_pre(text):
-    lines = text.splitlines()
-    blocks = []
-    for i, line in enumerate(lines):
-        if "OPEN INTEREST IS" in line.upper():
-            header_lines = []
-            for j in range(1, 4):
-                if i - j >= 0:
-                    header_lines.insert(0, lines[i - j].strip())
-            header = " ".join(header_lines).strip()
-            block = "\n".join(lines[i-1:i+60])
-            blocks.append((header, block))
-    return blocks
-
-def extract_row(lines, after_phrase):
-    for i, line in enumerate(lines):
-        if after_phrase.upper() in line.upper():
-            candidates = lines[i+1:i+4]
-            best = ""
-            max_count = 0
-            for c in candidates:
-                count = len(re.findall(r"-?\d[\d,\.]*", c))
-                if count > max_count:
-                    best = c
-                    max_count = count
-            return best
-    return ""
-
-def extract_largest_traders(lines):
-    largest = {}
-    pattern = re.compile(r"Percent of Open Interest Held by the Largest (\d) Traders.*?: ([\d\.]+)% Long, ([\d\.]+)% Short")
-    for line in lines:
-        match = pattern.search(line)
-        if match:
-            count = int(match.group(1))
-            largest[str(count)] = {
-                "long": float(match.group(2)),
-                "short": float(match.group(3))
-            }
-    return largest
+    return SYMBOLS.config()
 
+@timed("parse_cot_block")
 def parse_cot_block(header, block_text):
-    lines = block_text.splitlines()
-    categories = ["Non-Commercial", "Commercial", "Spreading", "Total", "Nonreportable"]
-
-    def extract_numbers(line, dtype=int):
-        return list(map(lambda x: dtype(x.replace(",", "")), re.findall(r"-?\d[\d,\.]*", line)))
-
-    open_interest = None
-    for line in lines:
-        m = re.search(r"Open Interest is\s+([\d,]+)", line)
-        if m:
-            open_interest = int(m.group(1).replace(",", ""))
-            break
-
-    pos = extract_numbers(extract_row(lines, "Positions"))
-    chg = extract_numbers(extract_row(lines, "Changes from"))
-    pct = extract_numbers(extract_row(lines, "Percent of Open Interest"), float)
-    trd = extract_numbers(extract_row(lines, "Number of Traders"))
-    largest_traders = extract_largest_traders(lines)
-
-    entry = {
-        "market": header,
-        "open_interest": open_interest,
-        "largest_traders": largest_traders,
-        "groups": []
-    }
+    BYTES_PARSED.inc(len(block_text), source="custom")
+    return parse_block(header, block_text).to_dict()
+
+def search_all_sources(report_name, index=None, store=None):
+    """Blokovi se nalaze preko indeksa, a parsirani unosi čitaju iz baze jednim upitom.
+
+    Parsiraju se (i upisuju u bazu) samo blokovi koje još niko nije parsirao.
+    """
+    index = index or COT_INDEX
+    store = BLOCK_STORE if store is None else store
+    located = list(index.locate(report_name))
+    cached = store.get_many([fingerprint for *_, fingerprint in located])
+    CACHE_REQUESTS.inc(len(cached), cache="cot_blocks", result="hit")
 
-    for i, cat in enumerate(categories):
-        offset = i * 3
-        try:
-            long = pos[offset]
-            short = pos[offset + 1]
-            spread = pos[offset + 2]
-            long_chg = chg[offset]
-            short_chg = chg[offset + 1]
-            spread_chg = chg[offset + 2]
-            long_pct = pct[offset] if offset < len(pct) else None
-            short_pct = pct[offset + 1] if offset+1 < len(pct) else None
-            num_traders = trd[i] if i < len(trd) else None
-        except IndexError:
-            continue
-
-        net = long - short
-        net_change = long_chg - short_chg
-        ratio = round(net / open_interest, 4) if open_interest else None
-        dominance = "bullish" if net > 0 else "bearish" if net < 0 else "neutral"
-        alert = "high" if ratio and abs(ratio) > 0.3 else "medium" if ratio and abs(ratio) > 0.15 else "low"
-        density = "low" if num_traders and num_traders < 20 else "normal" if num_traders and num_traders < 50 else "high"
-
-        entry["groups"].append({
-            "group": cat,
-            "long": long,
-            "short": short,
-            "spread": spread,
-            "traders": num_traders,
-            "analysis": {
-                "net": net,
-                "net_change": net_change,
-                "net_ratio": ratio,
-                "dominance": dominance,
-                "alert_level": alert,
-                "flip_tag": False,
-                "trader_density": density
-            },
-            "changes": {
-                "long_chg": long_chg,
-                "short_chg": short_chg,
-                "spread_chg": spread_chg
-            },
-            "percentages": {
-                "long_pct": long_pct,
-                "short_pct": short_pct
-            }
-        })
-
-    return entry
-
-def search_all_sources(report_name):
     results = []
-    for file in CACHE_DIR.glob("*.html"):
-        with open(file, "r", encoding="utf-8") as f:
-            html = f.read()
-        soup = BeautifulSoup(html, "html.parser")
-        pre = soup.find("pre")
-        if not pre:
-            continue
-        blocks = extract_blocks_from_pre(pre.get_text())
-        for header, block in blocks:
-            if report_name.upper() in header.upper():
-                print(f"📥 Pronađen blok: {report_name} u {file.name}")
-                entry = parse_cot_block(header, block)
-                entry["source"] = file.stem.split("_")[0]  # npr: financial_lf
-                results.append(entry)
+    parsed = {}
+    for file, header, start, end, fingerprint in located:
+        print(f"📥 Pronađen blok: {report_name} u {file.name}")
+        if fingerprint not in cached:
+            CACHE_REQUESTS.inc(cache="cot_blocks", result="miss")
+            cached[fingerprint] = parse_cot_block(header, read_block(file, start, end))
+            parsed[fingerprint] = (fingerprint, header, cached[fingerprint])
+        # Isti blok je često u više datiranih fajlova – svaki unos mora biti zaseban dict
+        entry = copy.deepcopy(cached[fingerprint])
+        entry["source"] = file.stem.rsplit("_", 1)[0]  # npr: financial_lf
+        results.append(entry)
+    store.put_many(parsed.values(), default_date=datetime.now().date().isoformat())
     return results
 
-def save_json(symbol_key, data):
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    filename = f"{symbol_key.lower().replace('/', '')}_cot.json"
-    filepath = OUT_DIR / filename
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def save_json(symbol_key, data, out_dir=OUT_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{symbol_key.lower().replace('/', '')}_cot"
+    filepath = Path(write_document(output_path(out_dir, stem), data))
     print(f"💾 JSON snimljen: {filepath}")
+    store_summary(str(filepath), cot_summary(data))
+    return filepath
+
+def symbol_entries(symbol, sym_info):
+    """Sirovi COT unosi (bez analitike) za jedan već razriješen simbol, ili None."""
+    if "cot" not in sym_info or "report_name" not in sym_info["cot"]:
+        print(f"⚠️ Nema mappinga za simbol: {symbol}")
+        return None
+
+    results = search_all_sources(sym_info["cot"]["report_name"])
+    if not results:
+        print(f"⚠️ Nema rezultata za: {symbol}")
+        return None
+    return results
+
+def load_history(reports):
+    """Istorija za tržišta svih simbola jednim čitanjem, umjesto jednog čitanja po simbolu."""
+    from modules.cot.cot_history import COT_HISTORY
+    return COT_HISTORY.frame({market_key(entry["market"]) for results in reports for entry in results})
+
+def analyze_symbol(symbol, results, record=True):
+    """Analitika (flip, z-score, COT indeks) iz istorije; vraća COT rezultat simbola.
+
+    record=True dopisuje izvještaj u istoriju.
+    """
+    # pandas (istorija, analitika) se učitava tek pri prvoj analizi – import modula ostaje brz
+    from modules.cot.cot_analytics import analyze_entries
+    from modules.cot.cot_history import COT_HISTORY
+
+    today = datetime.now().date().isoformat()
+    analyze_entries(results, COT_HISTORY, default_date=today)
+    if record:
+        COT_HISTORY.append(results, default_date=today)
+    return {
+        "symbol": symbol,
+        "collected_at": datetime.now().isoformat(),
+        "entries": results
+    }
+
+def run_cot_analysis(selected_input, output_dir=OUT_DIR):
+    """COT JSON po simbolu; vraća AnalysisResult za prvi snimljeni fajl (ili None)."""
+    if "ALL" in [s.upper() for s in selected_input]:
+        selected = SYMBOLS.resolve(["ALL"])
+    else:
+        selected = []
+        for name in selected_input:
+            found = SYMBOLS.get(name)
+            if found is None:
+                print(f"⚠️ Nepoznat simbol: {name}")
+            elif found not in selected:
+                selected.append(found)
+
+    reports = {}
+    for symbol, sym_info in selected:
+        results = symbol_entries(symbol, sym_info)
+        if results:
+            reports[symbol] = results
+    if not reports:
+        return None
+    load_history(reports.values())
+
+    outputs = {}
+    for symbol, results in reports.items():
+        result_json = analyze_symbol(symbol, results)
+        path = str(save_json(symbol, result_json, output_dir))
+        outputs[path] = cot_summary(result_json)
+
+    first_path = next(iter(outputs))
+    return AnalysisResult(first_path, outputs[first_path], outputs)
 
 # ▶️ MAIN
 if __name__ == "__main__":
@@ -172,31 +140,7 @@ if __name__ == "__main__":
     user_input = input("Unesi simbol(e) (ALL za sve, FULL za cijeli COT izvještaj): ").strip().lower()
 
     if user_input == "full":
-        os.system("python modules/cot/cot_fetcher_full.py")
-        exit()
-
-    selected = all_symbols if user_input == "all" else [normalize_symbol(user_input)]
-
-    for symbol in selected:
-        sym_info = next(
-            (info for key, info in cfg.items()
-             if symbol == key or symbol in [normalize_symbol(alias) for alias in info.get("aliases", [])]),
-            None
-        )
-        print(f"🔍 DEBUG: sym_info for {symbol} →", sym_info)
-        if not sym_info or "cot" not in sym_info or "report_name" not in sym_info["cot"]:
-            print(f"⚠️ Nema mappinga za simbol: {symbol}")
-            continue
-
-        report_name = sym_info["cot"]["report_name"]
-        results = search_all_sources(report_name)
-
-        if results:
-            result_json = {
-                "symbol": symbol,
-                "collected_at": datetime.now().isoformat(),
-                "entries": results
-            }
-            save_json(symbol, result_json)
-        else:
-            print(f"⚠️ Nema rezultata za: {symbol}")
+        import cot_fetcher_full
+        cot_fetcher_full.run_full_report()
+    else:
+        run_cot_analysis([user_input])
@@ -1,190 +1,302 @@
 import os
 import json
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime
-from bs4 import BeautifulSoup
 from pathlib import Path
-import re
+from modules.cot.block_store import STORE_FILENAME, block_fingerprint, open_store
+from modules.cot.content_cache import CACHE_DIR, ContentCache
+from modules.cot.cot_diff import diff_counts, diff_reports, diff_view
+from modules.cot.cot_parser import PARSER_VERSION, parse_block
+from modules.cot.pre_extractor import iter_cot_blocks
+from modules.utils.metrics import BYTES_PARSED, CACHE_REQUESTS, observe_span, timed
+from modules.utils.output_writer import iter_records, output_path, write_document, write_output
+from modules.utils.summary import cot_summary, store_summary
+from modules.utils.upstream import CFTC, UpstreamUnavailable
 
 # ⚙️ Konfiguracija putanja
-CACHE_DIR = Path("sources/cot_cache")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# Import nema sporednih efekata – folderi se prave i config čita tek u run_full_report()
+# CACHE_DIR (sources/cot_cache) dolazi iz content_cache – isti keš kao cot_fetcher_custom
 
 OUTPUT_FILE = Path("data/ai/full_cot_report.json")
-OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+# 🔀 Sedmične promjene u odnosu na prethodni izvještaj
+DIFF_FILE = Path("data/ai/full_cot_diff.json")
 
 CONFIG_PATH = Path("sources/cot_sources_config.json")
-TODAY = datetime.now().strftime("%Y-%m-%d")
 
-# 🔧 Učitaj izvorne linkove
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    sources = json.load(f)
+# ⚙️ Paralelno preuzimanje (threadovi) i parsiranje (procesi)
+DOWNLOAD_WORKERS = int(os.environ.get("COT_DOWNLOAD_WORKERS", "6"))
+PARSE_WORKERS = int(os.environ.get("COT_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
 
-def download_and_cache(url, filename):
+# 🗃️ Keš tijela odgovora po sha1 + ETag/Last-Modified po izvoru
+CONTENT_CACHE = ContentCache(CACHE_DIR)
+# 🧩 Parsirani blokovi po otisku (SQLite, dijeli se s appom i CLI-jem) – promijenjen izvor parsira samo promijenjene blokove
+BLOCK_STORE_PATH = str(CACHE_DIR / STORE_FILENAME)
+
+# 🔧 Izvorni linkovi
+def load_sources(config_path=None):
+    with open(config_path or CONFIG_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+@timed("download_and_cache")
+def download_and_cache(url, filename, client=CFTC):
+    """Uslovno preuzimanje (ETag / Last-Modified) u keš adresiran hashom.
+
+    Vraća putanju datiranog fajla, ili None ako sadržaj nije dostupan.
+    Ako upstream ne odgovori (ili je breaker otvoren), koristi se zadnja poznata kopija izvora.
+    """
     path = CACHE_DIR / filename
-    if path.exists():
-        print(f"📁 Keš postoji: {filename}")
-        return path
+    source_id = filename.rsplit("_", 1)[0]
+    headers = CONTENT_CACHE.conditional_headers(source_id)
+
     print(f"⬇️ Preuzimam: {url}")
-    response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+    try:
+        response = client.get(url, headers=headers)
+    except UpstreamUnavailable as e:
+        print(f"❌ Neuspješno preuzimanje: {url} ({e})")
+        return cached_copy(source_id, path)
+
+    if response.status_code == 304:
+        digest = CONTENT_CACHE.get_meta(source_id)["sha1"]
+        print(f"♻️ Nepromijenjeno: {source_id}")
+        return CONTENT_CACHE.link(digest, path)
+
     if response.status_code == 200:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(response.text)
+        digest = CONTENT_CACHE.store(response.content)
+        CONTENT_CACHE.link(digest, path)
+        CONTENT_CACHE.set_meta(
+            source_id,
+            sha1=digest,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            fetched_at=datetime.now().isoformat()
+        )
         print(f"💾 Sačuvano u: {path}")
         return path
     else:
         print(f"❌ Neuspješno preuzimanje: {url} ({response.status_code})")
-        return None
-
-def extract_cot_blocks_from_pre(text):
-    sections = []
-    lines = text.splitlines()
-    for idx, line in enumerate(lines):
-        if "OPEN INTEREST IS" in line.upper():
-            header_lines = []
-            for i in range(1, 4):
-                if idx - i >= 0:
-                    header_lines.insert(0, lines[idx - i].strip())
-            header = " ".join(header_lines)
-            block = "\n".join(lines[idx-1:idx+60])
-            sections.append((header.strip(), block))
-    return sections
-
-def extract_largest_traders(lines):
-    largest = {}
-    pattern = re.compile(r"Percent of Open Interest Held by the Largest (\d) Traders.*?: ([\d\.]+)% Long, ([\d\.]+)% Short")
-    for line in lines:
-        match = pattern.search(line)
-        if match:
-            count = int(match.group(1))
-            largest[str(count)] = {
-                "long": float(match.group(2)),
-                "short": float(match.group(3))
-            }
-    return largest
+        return cached_copy(source_id, path)
+
+def cached_copy(source_id, path):
+    digest = CONTENT_CACHE.get_meta(source_id).get("sha1")
+    if digest and CONTENT_CACHE.object_path(digest).exists():
+        print(f"📁 Koristim zadnju kopiju: {source_id}")
+        return CONTENT_CACHE.link(digest, path)
+    if path.exists():
+        print(f"📁 Keš postoji: {path.name}")
+        return path
+    return None
+
+def content_digest(source_id, path):
+    digest = CONTENT_CACHE.get_meta(source_id).get("sha1")
+    if not digest or not CONTENT_CACHE.object_path(digest).exists():
+        # Stari keš fajl bez metapodataka – prebaci ga u objekte
+        digest = CONTENT_CACHE.hash_file(path)
+        if not CONTENT_CACHE.object_path(digest).exists():
+            with open(path, "rb") as f:
+                CONTENT_CACHE.store(f.read())
+        CONTENT_CACHE.set_meta(source_id, sha1=digest)
+    return digest
 
 def parse_cot_block_full(market_name, block_text):
-    categories = ["Non-Commercial", "Commercial", "Spreading", "Total", "Nonreportable"]
-    groups = []
-    lines = block_text.splitlines()
-
-    open_interest = None
-    for line in lines:
-        match = re.search(r"Open Interest is\s+([\d,]+)", line)
-        if match:
-            open_interest = int(match.group(1).replace(",", ""))
-            break
-
-    def extract_row(after_phrase):
-        for i, line in enumerate(lines):
-            if after_phrase.upper() in line.upper():
-                candidates = lines[i+1:i+4]
-                best_line = ""
-                max_count = 0
-                for c in candidates:
-                    count = len(re.findall(r"-?\d[\d,\.]*", c))
-                    if count > max_count:
-                        best_line = c
-                        max_count = count
-                return best_line
-        return ""
-
-    def extract_numbers(line, dtype=int):
-        return list(map(lambda x: dtype(x.replace(",", "")), re.findall(r"-?\d[\d,\.]*", line)))
-
-    pos = extract_numbers(extract_row("Positions"), int)
-    chg = extract_numbers(extract_row("Changes from"), int)
-    pct = extract_numbers(extract_row("Percent of Open Interest"), float)
-    trd = extract_numbers(extract_row("Number of Traders"), int)
-    largest_traders = extract_largest_traders(lines)
-
-    result = {
-        "market": market_name,
-        "open_interest": open_interest,
-        "largest_traders": largest_traders,
-        "groups": []
+    return parse_block(market_name, block_text).to_dict()
+
+def parse_source(source_id, path, store_path=None):
+    """Parsira jedan keširani izvor; pokreće se u posebnom procesu.
+
+    Blokovi čiji otisak već postoji u bazi (store_path) se ne parsiraju; novi se upisuju.
+    Vraća (unosi, mjerenja) – spanovi iz procesa za parsiranje se bilježe u glavnom procesu.
+    """
+    started = time.perf_counter()
+    blocks = [(header, block, block_fingerprint(header, block)) for header, block in iter_cot_blocks(path)]
+    store = open_store(store_path) if store_path else None
+    known = store.get_many([fingerprint for *_, fingerprint in blocks]) if store is not None else {}
+
+    entries = []
+    parsed_blocks = []
+    seen = set()
+    parse_seconds = 0.0
+    parsed_bytes = 0
+    for header, block, fingerprint in blocks:
+        parsed = known.get(fingerprint)
+        if parsed is None:
+            block_started = time.perf_counter()
+            parsed = parse_cot_block_full(header, block)
+            parse_seconds += time.perf_counter() - block_started
+            parsed_bytes += len(block)
+            known[fingerprint] = parsed
+            parsed_blocks.append((fingerprint, header, parsed))
+        elif fingerprint in seen:
+            # Isti blok dvaput u izvoru – unosi se kasnije dopunjuju, ne smiju dijeliti dict
+            parsed = json.loads(json.dumps(parsed))
+        seen.add(fingerprint)
+        if parsed and parsed["groups"]:
+            entries.append(parsed)
+    if not blocks:
+        print(f"⚠️ Nema COT blokova u: {source_id}")
+    if store is not None:
+        store.put_many(parsed_blocks, default_date=datetime.now().date().isoformat())
+    stats = {
+        "extract_seconds": time.perf_counter() - started - parse_seconds,
+        "parse_seconds": parse_seconds,
+        "bytes": parsed_bytes,
+        "blocks": len(blocks),
+        "reused": len(blocks) - len(parsed_blocks),
     }
+    return entries, stats
+
+def record_parse_stats(source_id, stats):
+    observe_span("extract_blocks_from_pre", stats["extract_seconds"], source=source_id)
+    observe_span("parse_cot_block", stats["parse_seconds"], source=source_id)
+    BYTES_PARSED.inc(stats["bytes"], source=source_id)
+    CACHE_REQUESTS.inc(stats["reused"], cache="cot_blocks", result="hit")
+    CACHE_REQUESTS.inc(stats["blocks"] - stats["reused"], cache="cot_blocks", result="miss")
+    if stats["reused"]:
+        print(f"🧩 {source_id}: {stats['blocks'] - stats['reused']} promijenjenih od {stats['blocks']} blokova")
+
+def iter_full_report(sources, download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS):
+    """Generator (source_id, unosi) redoslijedom iz configa.
+
+    Preuzimanja idu kroz zajednički CFTC klijent, a svaki završeni fajl odmah
+    ide na parsiranje dok ostali još stižu. Nepromijenjen izvor se uopšte ne
+    parsira (unosi se čitaju iz keša tek kad dođe na red); u promijenjenom se
+    parsiraju samo blokovi čiji otisak nije u bazi parsiranih blokova.
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 0 else None
+    parsed = {}
+    digests = {}
+    paths = {}
 
-    for i, cat in enumerate(categories):
-        offset = i * 3
-        try:
-            long = pos[offset]
-            short = pos[offset + 1]
-            spread = pos[offset + 2]
-            long_chg = chg[offset]
-            short_chg = chg[offset + 1]
-            spread_chg = chg[offset + 2]
-            long_pct = pct[offset] if offset < len(pct) else None
-            short_pct = pct[offset + 1] if offset+1 < len(pct) else None
-            num_traders = trd[i] if i < len(trd) else None
-        except IndexError:
-            continue
-
-        net = long - short
-        net_change = long_chg - short_chg
-        ratio = round(net / open_interest, 4) if open_interest else None
-        dominance = "bullish" if net > 0 else "bearish" if net < 0 else "neutral"
-        alert = "high" if ratio and abs(ratio) > 0.3 else "medium" if ratio and abs(ratio) > 0.15 else "low"
-        density = "low" if num_traders and num_traders < 20 else "normal" if num_traders and num_traders < 50 else "high"
-
-        group_data = {
-            "group": cat,
-            "long": long,
-            "short": short,
-            "spread": spread,
-            "traders": num_traders,
-            "analysis": {
-                "net": net,
-                "net_change": net_change,
-                "net_ratio": ratio,
-                "dominance": dominance,
-                "alert_level": alert,
-                "flip_tag": False,
-                "trader_density": density
-            },
-            "changes": {
-                "long_chg": long_chg,
-                "short_chg": short_chg,
-                "spread_chg": spread_chg
-            },
-            "percentages": {
-                "long_pct": long_pct,
-                "short_pct": short_pct
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, download_workers)) as download_pool:
+            downloads = {
+                download_pool.submit(download_and_cache, url, f"{source_id}_{today}.html"): source_id
+                for source_id, url in sources.items()
             }
-        }
-
-        result["groups"].append(group_data)
-
-    return result
-
-# 📦 Glavna lista rezultata
-full_report = {
-    "symbol": "FULL",
-    "collected_at": datetime.now().isoformat(),
-    "entries": []
-}
-
-# 🔁 Loop kroz sve izvore
-for source_id, url in sources.items():
-    filename = f"{source_id}_{TODAY}.html"
-    path = download_and_cache(url, filename)
-    if not path:
-        continue
-    with open(path, "r", encoding="utf-8") as f:
-        html = f.read()
-    soup = BeautifulSoup(html, "html.parser")
-    pre = soup.find("pre")
-    if not pre:
-        print(f"⚠️ Nema <pre> taga u: {source_id}")
-        continue
-    blocks = extract_cot_blocks_from_pre(pre.get_text())
-    for header, block in blocks:
-        parsed = parse_cot_block_full(header, block)
-        if parsed and parsed["groups"]:
-            full_report["entries"].append(parsed)
+            for future in as_completed(downloads):
+                source_id = downloads[future]
+                path = future.result()
+                if not path:
+                    continue
+                digest = content_digest(source_id, path)
+                digests[source_id] = digest
+                paths[source_id] = path
+                cached = CONTENT_CACHE.parsed_path(digest, PARSER_VERSION).exists()
+                CACHE_REQUESTS.inc(cache="cot_parsed", result="hit" if cached else "miss")
+                if cached:
+                    # ⏭️ Isti sadržaj kao ranije – bez parsiranja
+                    print(f"⏭️ Bez promjena, preskačem parsiranje: {source_id}")
+                    parsed[source_id] = None
+                elif parse_pool is not None:
+                    parsed[source_id] = parse_pool.submit(parse_source, source_id, str(path), BLOCK_STORE_PATH)
+                else:
+                    parsed[source_id] = parse_source(source_id, str(path), BLOCK_STORE_PATH)
+
+        # 🔁 Deterministički redoslijed – isti kao u cot_sources_config.json
+        for source_id in sources:
+            if source_id not in parsed:
+                continue
+            result = parsed.pop(source_id)
+            entries = None
+            if result is None:
+                entries = CONTENT_CACHE.load_parsed(digests[source_id], PARSER_VERSION)
+                if entries is None:
+                    # Keš parsiranih unosa je u međuvremenu nestao ili je oštećen
+                    result = parse_source(source_id, str(paths[source_id]), BLOCK_STORE_PATH)
+            if entries is None:
+                entries, stats = result if isinstance(result, tuple) else result.result()
+                record_parse_stats(source_id, stats)
+                CONTENT_CACHE.save_parsed(digests[source_id], PARSER_VERSION, entries)
+            for entry in entries:
+                entry["source"] = source_id
+            yield source_id, entries
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    # 🧹 Blokovi starih izvještaja (po datumu izvještaja) ispadaju iz baze
+    evicted = open_store(BLOCK_STORE_PATH).evict()
+    if evicted:
+        print(f"🧹 Obrisano starih parsiranih blokova: {evicted}")
+
+def build_full_report(sources, download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS):
+    """Cijeli izvještaj u memoriji (bez analitike) – za poređenja i benchmark; snimanje ide preko run_full_report."""
+    full_report = {
+        "symbol": "FULL",
+        "collected_at": datetime.now().isoformat(),
+        "entries": []
+    }
+    for _, entries in iter_full_report(sources, download_workers, parse_workers):
+        full_report["entries"].extend(entries)
+    return full_report
+
+def previous_report(path):
+    """(collected_at, diff_view unosa) prethodnog izvještaja – čita se zapis po zapis prije nego se prepiše."""
+    collected_at, views = None, []
+    try:
+        for meta, entry in iter_records(path):
+            collected_at = meta.get("collected_at")
+            views.append(diff_view(entry))
+    except (OSError, ValueError):
+        return None, []
+    return collected_at, views
+
+def write_diff(previous, current, collected_at, previous_collected_at=None, diff_file=None):
+    """Snima listu promjena (nova/uklonjena tržišta, net flip, alert_level) pored izvještaja."""
+    diff_file = diff_file or output_path(DIFF_FILE.parent, DIFF_FILE.stem)
+    changes = diff_reports(previous, current)
+    counts = diff_counts(changes)
+    write_document(diff_file, {
+        "symbol": "FULL_DIFF",
+        "collected_at": collected_at,
+        "previous_collected_at": previous_collected_at,
+        "counts": counts,
+        "entries": changes,
+    })
+    print(f"🔀 Promjene: {counts} → {diff_file}")
+    return diff_file
+
+def run_full_report(output_file=None, sources=None):
+    """Preuzima sve izvore, parsira, dodaje analitiku i snima izvještaj + diff; vraća putanju.
+
+    Izvori idu jedan po jedan: analitika, upis u istoriju i upis u fajl (ndjson/msgpack
+    zapis po zapis), pa se u memoriji drže samo unosi izvora koji se upravo obrađuje i
+    diff_view (polja koja diff poredi) tekućeg i prethodnog izvještaja.
+    """
+    # pandas (istorija, analitika) se učitava tek ovdje – import modula ostaje brz
+    from modules.cot.cot_analytics import analyze_entries
+    from modules.cot.cot_history import COT_HISTORY
+
+    # Format izlaza iz OUTPUT_FORMAT/OUTPUT_GZIP (npr. full_cot_report.ndjson.gz)
+    output_file = output_file or output_path(OUTPUT_FILE.parent, OUTPUT_FILE.stem)
+    previous_collected_at, previous = previous_report(output_file)
+    meta = {"symbol": "FULL", "collected_at": datetime.now().isoformat()}
+    today = meta["collected_at"][:10]
+    current = []
+    first = []
+
+    def records():
+        for _, entries in iter_full_report(load_sources() if sources is None else sources):
+            # 📈 Analitika (flip_tag, cot_index, z-score) iz istorije, pa dopiši izvor u istoriju.
+            # Serije su po (tržište, grupa, izvor), pa izvor po izvor daje isto što i cijeli izvještaj.
+            analyze_entries(entries, COT_HISTORY, default_date=today)
+            COT_HISTORY.append(entries, default_date=today)
+            if entries and not first:
+                first.append(entries[0])
+            for entry in entries:
+                current.append(diff_view(entry))
+                yield entry
+
+    # 💾 Snimi izvještaj – zapisi idu u fajl čim je izvor analiziran
+    write_output(output_file, meta, records())
+    # 📌 Sažetak uz fajl (prvo tržište) – prikaz ne mora ponovo čitati cijeli izvještaj
+    store_summary(str(output_file), cot_summary({**meta, "entries": first}))
+    write_diff(previous, current, meta["collected_at"], previous_collected_at)
 
-# 💾 Snimi finalni JSON
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(full_report, f, indent=2)
+    print(f"✅ Full COT izvještaj sačuvan u: {output_file}")
+    return output_file
 
-print(f"✅ Full COT izvještaj sačuvan u: {OUTPUT_FILE}")
+if __name__ == "__main__":
+    run_full_report()
@@ -0,0 +1,127 @@
+# 📁 modules/cot/block_store.py
+import os
+import json
+import functools
+import sqlite3
+import hashlib
+import threading
+
+from modules.cot.cot_keys import market_key, report_date
+from modules.cot.cot_parser import PARSER_VERSION
+
+STORE_FILENAME = "parsed_blocks.sqlite"
+
+# 🧹 Blokovi stariji od ovoliko dana od najnovijeg izvještaja u bazi se brišu
+RETENTION_DAYS = int(os.environ.get("COT_BLOCK_RETENTION_DAYS", "56"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    fingerprint TEXT NOT NULL,
+    parser_version INTEGER NOT NULL,
+    report_date TEXT,
+    market TEXT,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (fingerprint, parser_version)
+);
+CREATE INDEX IF NOT EXISTS blocks_report_date ON blocks (report_date);
+"""
+
+# SQLite ograničava broj parametara po upitu
+CHUNK = 500
+
+
+def block_fingerprint(header, block):
+    """sha1 headera i teksta bloka – isti otisak znači isti rezultat parsiranja (uz istu verziju parsera)."""
+    h = hashlib.sha1(header.encode("utf-8", "replace"))
+    h.update(b"\n")
+    h.update(block.encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+class BlockStore:
+    """Parsirani COT blokovi u SQLite bazi, ključ (otisak bloka, verzija parsera).
+
+    Dijele je gunicorn workeri, CLI i procesi za parsiranje: WAL dozvoljava
+    čitanje dok neko piše, a busy timeout čeka umjesto da baci "database is locked".
+    Konekcija je po threadu i po procesu (nakon fork-a se otvara nova).
+    """
+
+    def __init__(self, path, version=PARSER_VERSION, timeout=30):
+        self.path = str(path)
+        self.version = version
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get_many(self, fingerprints):
+        """{otisak: unos} za pronađene otiske; unos je svjež dict (smije se mijenjati)."""
+        fingerprints = list(dict.fromkeys(fingerprints))
+        found = {}
+        conn = self._conn()
+        for i in range(0, len(fingerprints), CHUNK):
+            chunk = fingerprints[i:i + CHUNK]
+            rows = conn.execute(
+                f"SELECT fingerprint, entry FROM blocks WHERE parser_version = ? "
+                f"AND fingerprint IN ({','.join('?' * len(chunk))})",
+                [self.version, *chunk],
+            )
+            for fingerprint, entry in rows:
+                found[fingerprint] = json.loads(entry)
+        return found
+
+    def put_many(self, items, default_date=None):
+        """items: [(otisak, header, unos)] – jedna transakcija za sve."""
+        rows = [
+            (fingerprint, self.version, report_date(header, default_date), market_key(header),
+             json.dumps(entry, separators=(",", ":")))
+            for fingerprint, header, entry in items
+        ]
+        if not rows:
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def evict(self, retention_days=RETENTION_DAYS):
+        """Briše blokove starijih izvještaja i blokove drugih verzija parsera; vraća broj obrisanih."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "DELETE FROM blocks WHERE parser_version != ? OR report_date < "
+                "(SELECT date(MAX(report_date), ?) FROM blocks)",
+                [self.version, f"-{int(retention_days)} days"],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def open_store(path):
+    """Jedan BlockStore po putanji u procesu (i u procesima za parsiranje)."""
+    return BlockStore(path)
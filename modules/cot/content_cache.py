@@ -0,0 +1,124 @@
+# 📁 modules/cot/content_cache.py
+import os
+import json
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+# 📁 Zajednički keš oba COT fetchera – od korijena repoa, ne od radnog foldera (gunicorn, scheduler, benchmark)
+CACHE_DIR = Path(__file__).resolve().parents[2] / "sources" / "cot_cache"
+
+META_FILENAME = "cot_meta.json"
+OBJECTS_DIR = "objects"
+PARSED_DIR = "parsed"
+
+
+class ContentCache:
+    """Keš CFTC stranica adresiran hashom sadržaja.
+
+    - objects/<sha1>.html – jedna kopija svakog različitog tijela odgovora
+    - <source_id>_<datum>.html – hardlink (ili kopija) na objekt
+    - cot_meta.json – ETag / Last-Modified / sha1 zadnjeg odgovora po izvoru
+    - parsed/<sha1>-v<verzija>.json – parsirani unosi, da se isti sadržaj ne parsira ponovo
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / OBJECTS_DIR
+        self.parsed_dir = self.cache_dir / PARSED_DIR
+        self.meta_path = self.cache_dir / META_FILENAME
+        self._lock = threading.Lock()
+        self._meta = None
+
+    # 📋 Metapodaci po izvoru
+    def _load_meta(self):
+        if self._meta is None:
+            try:
+                with open(self.meta_path, "r", encoding="utf-8") as f:
+                    self._meta = json.load(f)
+            except (OSError, ValueError):
+                self._meta = {}
+        return self._meta
+
+    def get_meta(self, source_id):
+        with self._lock:
+            return dict(self._load_meta().get(source_id, {}))
+
+    def set_meta(self, source_id, **values):
+        with self._lock:
+            meta = self._load_meta()
+            meta.setdefault(source_id, {}).update(values)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.meta_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp, self.meta_path)
+
+    def conditional_headers(self, source_id):
+        """If-None-Match / If-Modified-Since, samo ako imamo objekt za taj izvor."""
+        meta = self.get_meta(source_id)
+        if not meta.get("sha1") or not self.object_path(meta["sha1"]).exists():
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    # 📦 Objekti
+    def object_path(self, digest):
+        return self.objects_dir / f"{digest}.html"
+
+    def store(self, body):
+        digest = hashlib.sha1(body).hexdigest()
+        path = self.object_path(digest)
+        if not path.exists():
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        return digest
+
+    def link(self, digest, path):
+        """Postavlja datirani fajl da pokazuje na objekt (hardlink, inače kopija)."""
+        path = Path(path)
+        target = self.object_path(digest)
+        if path.exists():
+            if path.samefile(target):
+                return path
+            path.unlink()
+        try:
+            os.link(target, path)
+        except OSError:
+            shutil.copyfile(target, path)
+        return path
+
+    def hash_file(self, path):
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    # 🧾 Parsirani rezultati po hashu sadržaja
+    def parsed_path(self, digest, version):
+        return self.parsed_dir / f"{digest}-v{version}.json"
+
+    def load_parsed(self, digest, version):
+        try:
+            with open(self.parsed_path(digest, version), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_parsed(self, digest, version, entries):
+        self.parsed_dir.mkdir(parents=True, exist_ok=True)
+        path = self.parsed_path(digest, version)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            # dumps (C enkoder) umjesto dump – dump ide kroz sporiji Python iterencode
+            f.write(json.dumps(entries))
+        os.replace(tmp, path)
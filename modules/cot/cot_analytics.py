@@ -0,0 +1,150 @@
+# 📁 modules/cot/cot_analytics.py
+import numpy as np
+import pandas as pd
+
+from modules.cot.cot_history import KEY, entries_to_frame
+
+SERIES_KEY = ["market", "group", "source"]
+
+# 📏 Prozori za rolling statistike (vremenski, po izvještajima jedne serije)
+WINDOW_52W = "364D"
+WINDOW_3Y = "1096D"
+
+def analyze_frame(df):
+    """Vektorski računa polja iz analysis bloka za sve redove izvještaja odjednom.
+
+    Ista pravila kao analyze_group u cot_parser: net_ratio samo uz open interest,
+    alert po |net_ratio|, trader_density "high" kad broj trgovaca nije poznat.
+    """
+    out = pd.DataFrame(index=df.index)
+    net = df["long"].to_numpy(dtype="int64") - df["short"].to_numpy(dtype="int64")
+    out["net"] = net
+    out["net_change"] = df["long_chg"].to_numpy(dtype="int64") - df["short_chg"].to_numpy(dtype="int64")
+
+    oi = pd.to_numeric(df["open_interest"], errors="coerce").to_numpy(dtype="float64")
+    has_oi = np.nan_to_num(oi) != 0
+    ratio = np.full(len(df), np.nan)
+    np.divide(net, oi, out=ratio, where=has_oi)
+    ratio = np.round(ratio, 4)
+    out["net_ratio"] = ratio
+
+    out["dominance"] = np.select([net > 0, net < 0], ["bullish", "bearish"], "neutral")
+
+    abs_ratio = np.abs(np.nan_to_num(ratio))
+    out["alert_level"] = np.select([abs_ratio > 0.3, abs_ratio > 0.15], ["high", "medium"], "low")
+
+    traders = np.nan_to_num(pd.to_numeric(df["traders"], errors="coerce").to_numpy(dtype="float64"))
+    has_traders = traders != 0
+    out["trader_density"] = np.select(
+        [has_traders & (traders < 20), has_traders & (traders < 50)], ["low", "normal"], "high"
+    )
+    return out
+
+def rolling_signals(current, history=None):
+    """Flip, z-score i COT indeks rasponi za tekuće redove, uz prethodne izvještaje iz istorije."""
+    series = current[KEY + ["net"]]
+    if history is not None:
+        # Iz istorije samo tržišta iz tekućeg izvještaja (frame može sadržati i druga učitana)
+        markets = current["market"].unique()
+        hist = history.frame(markets)["net"]
+        hist = hist[hist.index.get_level_values("market").isin(markets)]
+        if not hist.empty:
+            hist = hist.reset_index()
+            wanted = current[SERIES_KEY].drop_duplicates()
+            hist = hist.merge(wanted, on=SERIES_KEY, how="inner")
+            series = pd.concat([hist, series], ignore_index=True)
+
+    series = (
+        series.drop_duplicates(subset=KEY, keep="last")
+        .sort_values(KEY)
+        .set_index("report_date")
+    )
+    series["net"] = series["net"].astype("float64")
+    grouped = series.groupby(SERIES_KEY, sort=False)["net"]
+
+    keys = pd.MultiIndex.from_arrays(
+        [series["market"], series["group"], series["source"], series.index], names=KEY
+    )
+    signals = pd.DataFrame({"prev_net": grouped.shift(1).to_numpy()}, index=keys)
+
+    # rolling() vraća indeks (market, group, source, report_date) – poravnanje po ključu
+    r52 = grouped.rolling(WINDOW_52W)
+    r3y = grouped.rolling(WINDOW_3Y)
+    stats = pd.DataFrame({
+        "count_52w": r52.count(),
+        "mean_52w": r52.mean(),
+        "std_52w": r52.std(),
+        "min_52w": r52.min(),
+        "max_52w": r52.max(),
+        "count_3y": r3y.count(),
+        "min_3y": r3y.min(),
+        "max_3y": r3y.max(),
+    })
+    signals = signals.join(stats)
+
+    cur = signals.reindex(pd.MultiIndex.from_frame(current[KEY]))
+    net = current["net"].to_numpy(dtype="float64")
+    prev = cur["prev_net"].to_numpy()
+
+    out = pd.DataFrame(index=current.index)
+    out["flip_tag"] = ~np.isnan(prev) & (prev != 0) & (net != 0) & ((prev > 0) != (net > 0))
+
+    std = cur["std_52w"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (net - cur["mean_52w"].to_numpy()) / std
+        out["net_zscore_52w"] = np.where(std > 0, np.round(z, 2), np.nan)
+        out["cot_index_52w"] = _index(net, cur["min_52w"].to_numpy(), cur["max_52w"].to_numpy(), cur["count_52w"].to_numpy())
+        out["cot_index"] = _index(net, cur["min_3y"].to_numpy(), cur["max_3y"].to_numpy(), cur["count_3y"].to_numpy())
+    out["net_min_52w"] = cur["min_52w"].to_numpy()
+    out["net_max_52w"] = cur["max_52w"].to_numpy()
+    return out
+
+def _index(value, low, high, count):
+    span = high - low
+    idx = np.where(span > 0, np.round((value - low) / span * 100, 1), 50.0)
+    return np.where(count > 1, idx, np.nan)
+
+def _clean(values, cast=None):
+    """NumPy niz → lista Python vrijednosti, NaN → None (za JSON)."""
+    out = []
+    for v in values.tolist():
+        if v is None or (isinstance(v, float) and v != v):
+            out.append(None)
+        else:
+            out.append(cast(v) if cast else v)
+    return out
+
+def analyze_entries(entries, history=None, default_date=None):
+    """Analitika za cijeli izvještaj u jednom prolazu i upis nazad u JSON shemu.
+
+    Popunjava net, net_change, net_ratio, dominance, alert_level, trader_density,
+    flip_tag i cot_index, te net_zscore_52w, cot_index_52w, net_min_52w, net_max_52w.
+    """
+    df = entries_to_frame(entries, default_date)
+    if df.empty:
+        return entries
+    refs = [g["analysis"] for entry in entries for g in entry["groups"]]
+
+    base = analyze_frame(df)
+    columns = {
+        "net": _clean(base["net"].to_numpy(), int),
+        "net_change": _clean(base["net_change"].to_numpy(), int),
+        "net_ratio": _clean(base["net_ratio"].to_numpy(), float),
+        "dominance": base["dominance"].tolist(),
+        "alert_level": base["alert_level"].tolist(),
+        "trader_density": base["trader_density"].tolist(),
+    }
+
+    if df["report_date"].notna().all():
+        df["net"] = base["net"]
+        signals = rolling_signals(df, history)
+        columns["flip_tag"] = [bool(v) for v in signals["flip_tag"].tolist()]
+        for name in ("cot_index", "net_zscore_52w", "cot_index_52w"):
+            columns[name] = _clean(signals[name].to_numpy(), float)
+        for name in ("net_min_52w", "net_max_52w"):
+            columns[name] = _clean(signals[name].to_numpy(), int)
+
+    for name, values in columns.items():
+        for analysis, value in zip(refs, values):
+            analysis[name] = value
+    return entries
@@ -0,0 +1,92 @@
+# 📁 modules/cot/cot_diff.py
+from modules.cot.cot_keys import market_key
+
+# 🏷️ Vrste promjena u diff fajlu
+NEW_MARKET = "new_market"
+REMOVED_MARKET = "removed_market"
+CHANGED_MARKET = "changed_market"
+NET_FLIP = "net_flip"
+ALERT_CHANGE = "alert_change"
+
+
+# 🔍 Diff dva izvještaja
+def diff_view(entry):
+    """Samo polja koja diff poredi – izvještaji se za diff ne drže cijeli u memoriji."""
+    return {
+        "source": entry.get("source", ""),
+        "market": entry["market"],
+        "open_interest": entry.get("open_interest"),
+        "groups": [
+            {
+                "group": g["group"],
+                "long": g["long"],
+                "short": g["short"],
+                "spread": g["spread"],
+                "traders": g["traders"],
+                "analysis": {k: g["analysis"].get(k) for k in ("net", "dominance", "alert_level")},
+            }
+            for g in entry["groups"]
+        ],
+    }
+
+def _markets(entries):
+    """(izvor, tržište) → unos; header bez koda i datuma je stabilan ključ između sedmica."""
+    return {(e.get("source", ""), market_key(e["market"])): e for e in entries}
+
+def _raw(entry):
+    return (
+        entry.get("open_interest"),
+        [(g["group"], g["long"], g["short"], g["spread"], g["traders"]) for g in entry["groups"]],
+    )
+
+def _sign(value):
+    return (value > 0) - (value < 0) if value else 0
+
+def diff_reports(previous, current):
+    """Lista promjena između prethodnog i tekućeg izvještaja (oba nakon analitike).
+
+    Nova i uklonjena tržišta, tržišta s promijenjenim brojevima, promjena
+    predznaka neta po grupi (net_flip) i promjena alert_level po grupi.
+    """
+    before = _markets(previous)
+    after = _markets(current)
+    changes = []
+
+    for (source, market), entry in after.items():
+        old = before.get((source, market))
+        if old is None:
+            changes.append({"change": NEW_MARKET, "source": source, "market": market,
+                            "open_interest": entry.get("open_interest")})
+            continue
+        if _raw(old) == _raw(entry):
+            continue
+        changes.append({"change": CHANGED_MARKET, "source": source, "market": market,
+                        "previous_open_interest": old.get("open_interest"),
+                        "open_interest": entry.get("open_interest")})
+
+        old_groups = {g["group"]: g["analysis"] for g in old["groups"]}
+        for g in entry["groups"]:
+            prev = old_groups.get(g["group"])
+            if prev is None:
+                continue
+            cur = g["analysis"]
+            prev_sign, cur_sign = _sign(prev.get("net")), _sign(cur.get("net"))
+            if prev_sign and cur_sign and prev_sign != cur_sign:
+                changes.append({"change": NET_FLIP, "source": source, "market": market, "group": g["group"],
+                                "previous_net": prev.get("net"), "net": cur.get("net"),
+                                "dominance": cur.get("dominance")})
+            if prev.get("alert_level") != cur.get("alert_level"):
+                changes.append({"change": ALERT_CHANGE, "source": source, "market": market, "group": g["group"],
+                                "previous_alert_level": prev.get("alert_level"),
+                                "alert_level": cur.get("alert_level")})
+
+    for (source, market), entry in before.items():
+        if (source, market) not in after:
+            changes.append({"change": REMOVED_MARKET, "source": source, "market": market})
+    return changes
+
+def diff_counts(changes):
+    counts = {kind: 0 for kind in (NEW_MARKET, REMOVED_MARKET, CHANGED_MARKET, NET_FLIP, ALERT_CHANGE)}
+    for change in changes:
+        counts[change["change"]] += 1
+    return counts
@@ -0,0 +1,226 @@
+# 📁 modules/cot/cot_history.py
+import os
+import threading
+import functools
+import contextlib
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from modules.cot.cot_keys import market_key, report_date
+
+# Istorija je kolonarna (parquet) – bez pyarrow greška odmah, ne tihi prelazak na pickle.
+# Samo provjera da je instaliran – sam import je skup, pandas ga učita pri prvom parquet čitanju.
+if importlib.util.find_spec("pyarrow") is None:
+    raise ImportError("COT istorija se čuva kao parquet – instaliraj pyarrow (pip install -r requirements.txt)")
+EXT = ".parquet"
+
+HISTORY_DIR = Path("data/cot_history")
+MANIFEST = "_manifest"
+LOCK_FILE = "_lock"
+
+# Pisci u istom procesu (job workeri, scheduler) – fcntl lock pokriva ostale procese
+_write_lock = threading.Lock()
+
+COLUMNS = [
+    "report_date", "source", "market", "group", "open_interest",
+    "long", "short", "spread", "traders",
+    "long_chg", "short_chg", "spread_chg", "long_pct", "short_pct",
+    "net", "net_change", "net_ratio",
+]
+KEY = ["market", "group", "source", "report_date"]
+
+def entries_to_frame(entries, default_date=None):
+    """Pretvara COT unose (JSON shema) u ravnu tabelu – jedan red po (tržište, grupa)."""
+    rows = []
+    for entry in entries:
+        market = market_key(entry["market"])
+        date = entry.get("report_date") or report_date(entry["market"], default_date)
+        for g in entry["groups"]:
+            rows.append((
+                date, entry.get("source", ""), market, g["group"], entry.get("open_interest"),
+                g["long"], g["short"], g["spread"], g["traders"],
+                g["changes"]["long_chg"], g["changes"]["short_chg"], g["changes"]["spread_chg"],
+                g["percentages"]["long_pct"], g["percentages"]["short_pct"],
+                g["analysis"]["net"], g["analysis"]["net_change"], g["analysis"]["net_ratio"],
+            ))
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    df["report_date"] = pd.to_datetime(df["report_date"])
+    return df
+
+@functools.lru_cache(maxsize=None)
+def parquet_schema():
+    """Ista šema za sve particije – kolona koja je u jednoj particiji sva None ne mijenja tip."""
+    import pyarrow as pa
+    types = {
+        "report_date": pa.timestamp("us"),
+        "source": pa.string(), "market": pa.string(), "group": pa.string(),
+        "long_pct": pa.float64(), "short_pct": pa.float64(), "net_ratio": pa.float64(),
+    }
+    return pa.schema([(column, types.get(column, pa.int64())) for column in COLUMNS])
+
+def _indexed(df):
+    return df.sort_values(KEY).drop_duplicates(subset=KEY, keep="last").set_index(KEY).sort_index()
+
+
+class CotHistory:
+    """Append-only istorija COT zapisa, particionisana po datumu izvještaja i izvoru.
+
+    data/cot_history/report_date=YYYY-MM-DD/<source>.parquet.
+    U memoriji se drže samo tražena tržišta, kao jedna tabela sortirana po
+    (market, group, source, report_date). Vlastiti upisi se dodaju u tu tabelu;
+    ponovo se čita s diska tek kad manifest promijeni drugi proces.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._frame = None
+        self._markets = set()
+        self._all = False
+        self._stamp = None
+
+    def _partition(self, date, source):
+        return self.root / f"report_date={date}" / f"{source or 'unknown'}{EXT}"
+
+    def _read(self, path):
+        return pd.read_parquet(path)
+
+    def _write(self, df, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp, index=False, schema=parquet_schema())
+        os.replace(tmp, path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Ekskluzivni lock za read-modify-write particija – i između threadova i između procesa."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _write_lock, open(self.root / LOCK_FILE, "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            # Zatvaranje fajla otpušta fcntl lock
+            yield
+
+    def _touch_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / MANIFEST).write_text(datetime.now().isoformat())
+
+    def _manifest_stamp(self):
+        try:
+            stat = (self.root / MANIFEST).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, markets=None):
+        """Redovi traženih tržišta (None = sva) iz svih particija, jednim pyarrow skeniranjem."""
+        import pyarrow.dataset as ds
+
+        files = sorted(str(p) for p in self.root.glob(f"report_date=*/*{EXT}"))
+        if not files:
+            df = pd.DataFrame(columns=COLUMNS)
+            df["report_date"] = pd.to_datetime(df["report_date"])
+            return _indexed(df)
+        dataset = ds.dataset(files, format="parquet", schema=parquet_schema())
+        condition = ds.field("market").isin(sorted(markets)) if markets is not None else None
+        return _indexed(dataset.to_table(filter=condition).to_pandas())
+
+    def append(self, entries, default_date=None):
+        """Upisuje unose u particije; isti (market, group) za isti datum/izvor se zamjenjuje.
+
+        Particija se čita, spaja i zamjenjuje pod lockom – istovremeni upisi u
+        istu particiju (npr. dva tržišta istog dana) ne gube redove.
+        """
+        df = entries_to_frame(entries, default_date)
+        if df.empty:
+            return 0
+        with self._locked():
+            before = self._manifest_stamp()
+            for (date, source), part in df.groupby([df["report_date"].dt.date.astype(str), "source"]):
+                path = self._partition(date, source)
+                if path.exists():
+                    part = pd.concat([self._read(path), part], ignore_index=True)
+                    part = part.drop_duplicates(subset=["market", "group"], keep="last")
+                self._write(part.reset_index(drop=True), path)
+            self._touch_manifest()
+            after = self._manifest_stamp()
+
+        with self._lock:
+            # Niko drugi nije pisao od učitavanja → novi redovi idu u memoriju, bez čitanja diska
+            if self._frame is not None and self._stamp == before:
+                rows = df if self._all else df[df["market"].isin(self._markets)]
+                frame = pd.concat([self._frame, _indexed(rows)])
+                self._frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                self._stamp = after
+        return len(df)
+
+    def frame(self, markets=None):
+        """Istorija kao DataFrame sa indeksom (market, group, source, report_date).
+
+        Sa markets se s diska čitaju samo ta tržišta (koja još nisu u memoriji);
+        rezultat može sadržati i ranije učitana tržišta. Bez markets – cijela istorija.
+        """
+        stamp = self._manifest_stamp()
+        with self._lock:
+            if self._frame is None or stamp != self._stamp:
+                self._frame = None
+                self._markets = set()
+                self._all = False
+                self._stamp = stamp
+            if self._all:
+                return self._frame
+            if markets is None:
+                self._frame = self._load()
+                self._all = True
+                return self._frame
+            missing = {market_key(m) for m in markets} - self._markets
+            if missing or self._frame is None:
+                loaded = self._load(missing)
+                self._frame = loaded if self._frame is None else pd.concat([self._frame, loaded]).sort_index()
+                self._markets |= missing
+            return self._frame
+
+    def series(self, market, group, column="net", years=3, until=None, source=None):
+        """Vremenska serija jedne kolone za (tržište, grupu) u zadnjih N godina.
+
+        Bez izvora uzima se izvor sa najviše izvještaja za to tržište.
+        """
+        df = self.frame([market])
+        try:
+            sub = df.loc[(market_key(market), group), column]
+        except KeyError:
+            return pd.Series(dtype="float64", name=column)
+        sources = sub.index.get_level_values("source")
+        if source is None:
+            source = sources.value_counts().idxmax()
+        if source not in sources:
+            return pd.Series(dtype="float64", name=column)
+        s = sub.xs(source, level="source")
+        until = pd.Timestamp(until) if until is not None else s.index.max()
+        start = until - timedelta(days=int(365.25 * years))
+        return s.loc[start:until]
+
+    def net_by_group(self, market, years=3, source=None):
+        """Net pozicija po grupi (kolone) kroz vrijeme (redovi) za jedno tržište."""
+        df = self.frame([market])
+        try:
+            sub = df.xs(market_key(market), level="market")["net"]
+        except KeyError:
+            return pd.DataFrame()
+        if source is None:
+            source = sub.index.get_level_values("source").value_counts().idxmax()
+        table = sub.xs(source, level="source").unstack("group")
+        start = table.index.max() - timedelta(days=int(365.25 * years))
+        return table.loc[start:]
+
+
+# 🗃️ Jedna istorija po procesu – učitana tržišta ostaju u memoriji između zahtjeva
+COT_HISTORY = CotHistory()
@@ -0,0 +1,119 @@
+# 📁 modules/cot/cot_index.py
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from modules.cot.block_store import block_fingerprint
+from modules.cot.pre_extractor import html_to_text, iter_blocks, iter_pre_lines
+
+INDEX_FILENAME = "cot_index.json"
+INDEX_VERSION = 2
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def scan_block_offsets(path):
+    """Vraća [(header, start, end, otisak)] – bajt pozicije blokova unutar <pre> regiona."""
+    return [
+        (header, start, end, block_fingerprint(header, block))
+        for header, block, start, end in iter_blocks(iter_pre_lines(path))
+    ]
+
+def read_block(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    return html_to_text(raw.decode("utf-8", "replace")).replace("\r\n", "\n")
+
+
+class CotIndex:
+    """Perzistentni indeks market header → (fajl, bajt offset) za COT keš.
+
+    Fajl se ponovo indeksira samo kad mu se promijeni mtime/veličina i hash.
+    """
+
+    def __init__(self, cache_dir, pattern="*.html"):
+        self.cache_dir = Path(cache_dir)
+        self.pattern = pattern
+        self.index_path = self.cache_dir / INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._files = None
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data.get("files", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self):
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+        os.replace(tmp, self.index_path)
+
+    def refresh(self):
+        with self._lock:
+            if self._files is None:
+                self._files = self._load()
+
+            changed = False
+            present = set()
+            # Dnevni fajl je često hardlink/kopija već indeksiranog – isti sadržaj, isti blokovi
+            by_hash = {entry["sha1"]: entry for entry in self._files.values()}
+            for path in sorted(self.cache_dir.glob(self.pattern)):
+                name = path.name
+                present.add(name)
+                stat = path.stat()
+                entry = self._files.get(name)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    continue
+
+                digest = file_hash(path)
+                if entry and entry["sha1"] == digest:
+                    entry["mtime"] = stat.st_mtime
+                    entry["size"] = stat.st_size
+                    changed = True
+                    continue
+
+                same = by_hash.get(digest)
+                if same is not None:
+                    blocks = same["blocks"]
+                else:
+                    print(f"🗂️ Indeksiram: {name}")
+                    blocks = scan_block_offsets(path)
+                entry = self._files[name] = {
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size,
+                    "sha1": digest,
+                    "blocks": blocks,
+                }
+                by_hash[digest] = entry
+                changed = True
+
+            for name in list(self._files):
+                if name not in present:
+                    del self._files[name]
+                    changed = True
+
+            if changed:
+                self._save()
+            return self._files
+
+    def locate(self, report_name):
+        """Generator (path, header, start, end, otisak) – bez čitanja samih blokova."""
+        needle = report_name.upper()
+        files = self.refresh()
+        for name in sorted(files):
+            path = self.cache_dir / name
+            for header, start, end, fingerprint in files[name]["blocks"]:
+                if needle in header.upper():
+                    yield path, header, start, end, fingerprint
@@ -0,0 +1,23 @@
+# 📁 modules/cot/cot_keys.py
+import re
+from datetime import datetime
+
+# 🔑 Ključevi iz headera bloka – bez pandasa, da ih indeks, baza blokova i diff mogu brzo importovati
+DATE_LONG = re.compile(r"as of\s+([A-Z][a-z]+ \d{1,2}, \d{4})", re.IGNORECASE)
+DATE_SHORT = re.compile(r"as of\s+(\d{2}/\d{2}/\d{2,4})", re.IGNORECASE)
+CODE = re.compile(r"\s+Code-\w+.*$", re.DOTALL)
+
+def market_key(header):
+    """Naziv tržišta bez CFTC koda i ostatka headera (npr. "EURO FX - CHICAGO MERCANTILE EXCHANGE")."""
+    return CODE.sub("", header).strip()
+
+def report_date(text, default=None):
+    """Datum izvještaja iz headera bloka ("as of June 24, 2025" ili "AS OF 06/24/25")."""
+    m = DATE_LONG.search(text)
+    if m:
+        return datetime.strptime(m.group(1).title(), "%B %d, %Y").date().isoformat()
+    m = DATE_SHORT.search(text)
+    if m:
+        fmt = "%m/%d/%y" if len(m.group(1)) == 8 else "%m/%d/%Y"
+        return datetime.strptime(m.group(1), fmt).date().isoformat()
+    return default
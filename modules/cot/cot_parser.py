@@ -0,0 +1,166 @@
+# 📁 modules/cot/cot_parser.py
+import re
+from typing import NamedTuple, Optional
+
+PARSER_VERSION = 1
+
+CATEGORIES = ["Non-Commercial", "Commercial", "Spreading", "Total", "Nonreportable"]
+
+# 🔎 Fraze iza kojih slijedi red sa brojevima (fraza u bloku → ključ)
+ROW_PHRASES = {
+    "POSITIONS": "pos",
+    "CHANGES FROM": "chg",
+    "PERCENT OF OPEN INTEREST": "pct",
+    "NUMBER OF TRADERS": "trd",
+}
+ROW_PHRASE = re.compile("|".join(re.escape(p) for p in ROW_PHRASES), re.IGNORECASE)
+
+NUMBER = re.compile(r"-?\d[\d,\.]*")
+OPEN_INTEREST = re.compile(r"Open Interest is[^\S\n]+([\d,]+)")
+LARGEST_TRADERS = re.compile(r"Percent of Open Interest Held by the Largest (\d) Traders.*?: ([\d\.]+)% Long, ([\d\.]+)% Short")
+
+
+class CotGroup(NamedTuple):
+    group: str
+    long: int
+    short: int
+    spread: int
+    traders: Optional[int]
+    long_chg: int
+    short_chg: int
+    spread_chg: int
+    long_pct: Optional[float]
+    short_pct: Optional[float]
+    net: int
+    net_change: int
+    net_ratio: Optional[float]
+    dominance: str
+    alert_level: str
+    trader_density: str
+    flip_tag: bool = False
+
+    def to_dict(self):
+        return {
+            "group": self.group,
+            "long": self.long,
+            "short": self.short,
+            "spread": self.spread,
+            "traders": self.traders,
+            "analysis": {
+                "net": self.net,
+                "net_change": self.net_change,
+                "net_ratio": self.net_ratio,
+                "dominance": self.dominance,
+                "alert_level": self.alert_level,
+                "flip_tag": self.flip_tag,
+                "trader_density": self.trader_density
+            },
+            "changes": {
+                "long_chg": self.long_chg,
+                "short_chg": self.short_chg,
+                "spread_chg": self.spread_chg
+            },
+            "percentages": {
+                "long_pct": self.long_pct,
+                "short_pct": self.short_pct
+            }
+        }
+
+
+class CotRecord(NamedTuple):
+    market: str
+    open_interest: Optional[int]
+    largest_traders: dict
+    groups: tuple
+
+    def to_dict(self):
+        return {
+            "market": self.market,
+            "open_interest": self.open_interest,
+            "largest_traders": self.largest_traders,
+            "groups": [g.to_dict() for g in self.groups]
+        }
+
+
+def numbers(tokens, dtype=int):
+    return [dtype(x.replace(",", "")) for x in tokens]
+
+def analyze_group(net, net_change, open_interest, num_traders):
+    ratio = round(net / open_interest, 4) if open_interest else None
+    dominance = "bullish" if net > 0 else "bearish" if net < 0 else "neutral"
+    alert = "high" if ratio and abs(ratio) > 0.3 else "medium" if ratio and abs(ratio) > 0.15 else "low"
+    density = "low" if num_traders and num_traders < 20 else "normal" if num_traders and num_traders < 50 else "high"
+    return ratio, dominance, alert, density
+
+def scan_block(block_text, lines):
+    """Jedan prolaz kroz blok.
+
+    Vraća (open_interest, {ključ: brojevi iz reda kao stringovi}, largest_traders).
+    Za svaku frazu uzima se prva linija koja je sadrži, a od naredne tri
+    linije ona sa najviše brojeva.
+    """
+    m = OPEN_INTEREST.search(block_text)
+    open_interest = int(m.group(1).replace(",", "")) if m else None
+
+    largest = {}
+    for m in LARGEST_TRADERS.finditer(block_text):
+        largest[m.group(1)] = {
+            "long": float(m.group(2)),
+            "short": float(m.group(3))
+        }
+
+    found = {}
+    for i, line in enumerate(lines):
+        for phrase in ROW_PHRASE.findall(line):
+            found.setdefault(ROW_PHRASES[phrase.upper()], i)
+        if len(found) == len(ROW_PHRASES):
+            break
+
+    tokens = {}
+    rows = {}
+    for key in ROW_PHRASES.values():
+        idx = found.get(key)
+        best = []
+        if idx is not None:
+            for j in range(idx + 1, min(idx + 4, len(lines))):
+                if j not in tokens:
+                    tokens[j] = NUMBER.findall(lines[j])
+                if len(tokens[j]) > len(best):
+                    best = tokens[j]
+        rows[key] = best
+
+    return open_interest, rows, largest
+
+def parse_block(header, block_text):
+    """Parsira jedan COT blok u kompaktan CotRecord."""
+    lines = block_text.splitlines()
+    open_interest, rows, largest_traders = scan_block(block_text, lines)
+
+    pos = numbers(rows["pos"])
+    chg = numbers(rows["chg"])
+    pct = numbers(rows["pct"], float)
+    trd = numbers(rows["trd"])
+
+    groups = []
+    for i, cat in enumerate(CATEGORIES):
+        offset = i * 3
+        if offset + 2 >= len(pos) or offset + 2 >= len(chg):
+            continue
+
+        long, short, spread = pos[offset:offset + 3]
+        long_chg, short_chg, spread_chg = chg[offset:offset + 3]
+        long_pct = pct[offset] if offset < len(pct) else None
+        short_pct = pct[offset + 1] if offset + 1 < len(pct) else None
+        num_traders = trd[i] if i < len(trd) else None
+
+        net = long - short
+        net_change = long_chg - short_chg
+        ratio, dominance, alert, density = analyze_group(net, net_change, open_interest, num_traders)
+
+        groups.append(CotGroup(
+            cat, long, short, spread, num_traders,
+            long_chg, short_chg, spread_chg, long_pct, short_pct,
+            net, net_change, ratio, dominance, alert, density
+        ))
+
+    return CotRecord(header, open_interest, largest_traders, tuple(groups))
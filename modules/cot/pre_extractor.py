@@ -0,0 +1,88 @@
+# 📁 modules/cot/pre_extractor.py
+import re
+import html
+from collections import deque
+
+PRE_OPEN = re.compile(rb"<pre[^>]*>", re.IGNORECASE)
+PRE_CLOSE = re.compile(rb"</pre\s*>", re.IGNORECASE)
+TAG = re.compile(r"<[^>]+>")
+
+# 📏 Blok = linija prije "OPEN INTEREST IS" + ta linija + narednih 59
+BLOCK_LINES = 61
+HEADER_LINES = 3
+
+def html_to_text(raw):
+    """Isto što i BeautifulSoup get_text() za sadržaj <pre> taga."""
+    return html.unescape(TAG.sub("", raw))
+
+def iter_pre_lines(path):
+    """Čita fajl liniju po liniju (bafer, bez DOM-a) i vraća linije unutar prvog <pre>.
+
+    Generator (text, start, end) – start/end su bajt pozicije linije u fajlu.
+    """
+    inside = False
+    offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            line_start = offset
+            offset += len(raw)
+            start, end = 0, len(raw.rstrip(b"\r\n"))
+
+            if not inside:
+                m = PRE_OPEN.search(raw)
+                if not m:
+                    continue
+                inside = True
+                start = m.end()
+
+            close = PRE_CLOSE.search(raw, start)
+            if close:
+                # Kao splitlines() nad get_text(): prazna linija prije </pre> se ne broji
+                if close.start() == start:
+                    return
+                end = min(end, close.start())
+
+            text = html_to_text(raw[start:end].decode("utf-8", "replace"))
+            yield text, line_start + start, line_start + end
+
+            if close:
+                return
+
+def iter_blocks(lines):
+    """Generator (header, block, start, end) za svaki COT market blok.
+
+    lines je iterable (text, start, end); u memoriji se drže samo zadnje
+    linije za header i blokovi koji se još pune.
+    """
+    recent = deque(maxlen=HEADER_LINES)
+    pending = deque()
+
+    for text, start, end in lines:
+        for block in pending:
+            if block[4] > 0:
+                block[2].append(text)
+                block[3] = end
+                block[4] -= 1
+
+        if "OPEN INTEREST IS" in text.upper():
+            header = " ".join(l[0].strip() for l in recent).strip()
+            if recent:
+                prev_text, prev_start, _ = recent[-1]
+                block_lines, block_start = [prev_text, text], prev_start
+            else:
+                block_lines, block_start = [text], start
+            pending.append([header, block_start, block_lines, end, BLOCK_LINES - len(block_lines)])
+
+        while pending and pending[0][4] == 0:
+            header, block_start, block_lines, block_end, _ = pending.popleft()
+            yield header, "\n".join(block_lines), block_start, block_end
+
+        recent.append((text, start, end))
+
+    for header, block_start, block_lines, block_end, _ in pending:
+        yield header, "\n".join(block_lines), block_start, block_end
+
+def iter_cot_blocks(path):
+    """Generator (header, block) za sve COT blokove keširanog fajla – bez učitavanja cijelog HTML-a."""
+    for header, block, _, _ in iter_blocks(iter_pre_lines(path)):
+        yield header, block
@@ -0,0 +1,254 @@
+# 📁 modules/utils/job_queue.py
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_DIR = os.path.join("output_files", "jobs")
+# 🔒 Jedan lock fajl po (mode, skup simbola) dok posao radi – vidljiv svim gunicorn workerima
+ACTIVE_DIR = "active"
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class Job:
+    __slots__ = ("id", "mode", "symbols", "status", "result", "error", "created_at", "finished_at", "pid", "events")
+
+    def __init__(self, mode, symbols):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.symbols = symbols
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.pid = os.getpid()
+        # 📡 Napredak posla ({"event", "data"}) – /jobs/<id>/stream ga šalje klijentu
+        self.events = []
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "mode": self.mode,
+            "symbols": self.symbols,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "pid": self.pid,
+            "events": list(self.events),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Posao drugog workera (pročitan s diska)."""
+        job = cls.__new__(cls)
+        job.id = data["job_id"]
+        for name in cls.__slots__[1:]:
+            setattr(job, name, data.get(name))
+        job.events = job.events or []
+        return job
+
+
+def pid_alive(pid):
+    if not pid or os.name != "posix":
+        # Bez POSIX signala ne možemo provjeriti – posao se smatra živim
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Pozadinski poslovi za analizu: submit odmah vraća job id, posao radi lokalni pool.
+
+    Isti (mode, skup simbola) koji je već u toku ne pokreće novi posao – vraća
+    se postojeći job, i kad ga je pokrenuo drugi gunicorn worker (lock fajl u
+    JOBS_DIR/active). Stanje se upisuje u JOBS_DIR, pa status može pročitati
+    svaki worker; posao čiji je worker umro označava se kao greška.
+    """
+
+    def __init__(self, max_workers=4, jobs_dir=JOBS_DIR, keep_seconds=3600, prune_interval=60):
+        self.jobs_dir = jobs_dir
+        self.keep_seconds = keep_seconds
+        self.prune_interval = prune_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pruned_at = 0.0
+
+    @staticmethod
+    def job_key(mode, symbols):
+        return mode, frozenset(s.upper() for s in symbols)
+
+    def submit(self, mode, symbols, func):
+        """func(emit) radi posao i vraća rezultat (dict koji se može snimiti kao JSON).
+
+        emit(event, data) dodaje događaj napretka poslu.
+        """
+        key = self.job_key(mode, symbols)
+        self._prune()
+        job = Job(mode, list(symbols))
+        with self._lock:
+            owner = self._claim(key, job.id)
+            if owner is not None:
+                return owner
+            self._jobs[job.id] = job
+        self._persist(job)
+        self._pool.submit(self._run, job, key, func)
+        return job
+
+    def _run(self, job, key, func):
+        job.status = "running"
+        self._persist(job)
+        try:
+            job.result = func(lambda event, data: self._emit(job, event, data))
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished_at = time.time()
+            self._persist(job)
+            self._release(self._key_path(key), job.id)
+
+    def _emit(self, job, event, data):
+        job.events.append({"event": event, "data": data})
+        # Upis na disk – stream u drugom workeru vidi događaj
+        self._persist(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        # 🗂️ Posao iz drugog workera
+        path = self._path(job_id)
+        if not path:
+            return None
+        data = self._read(path)
+        return self._expire_orphan(path, data) if data is not None else None
+
+    # 🔒 Lock po ključu posla
+    def _key_path(self, key):
+        mode, symbols = key
+        digest = hashlib.sha1(f"{mode}|{'|'.join(sorted(symbols))}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.jobs_dir, ACTIVE_DIR, f"{digest}.lock")
+
+    def _claim(self, key, job_id):
+        """Atomski zauzima ključ; vraća None ako je zauzet za job_id, inače Job koji već radi.
+
+        Poziva se pod self._lock.
+        """
+        path = self._key_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for _ in range(3):
+            # Lock se pravi s O_EXCL preko privremenog fajla i os.link – kad postoji, već sadrži job id
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(job_id)
+            try:
+                os.link(tmp, path)
+                return None
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp)
+
+            owner = self._owner(path)
+            job = self._jobs.get(owner)
+            if job is None and owner:
+                job_path = self._path(owner)
+                data = self._read(job_path) if job_path else None
+                job = Job.from_dict(self._expire_orphan(job_path, data)) if data is not None else None
+            if job is not None and job.status in ACTIVE_STATUSES:
+                return job
+            # Lock bez posla u toku (worker je pao prije nego ga je pustio) – briše se
+            self._release(path, owner)
+        raise RuntimeError("Ne mogu zauzeti posao – lock fajl se stalno mijenja.")
+
+    def _owner(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _release(self, path, job_id):
+        """Briše lock samo ako još pripada ovom poslu (u međuvremenu ga je mogao uzeti drugi)."""
+        if self._owner(path) == job_id:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # 💾 Fajlovi poslova
+    def _path(self, job_id):
+        if not job_id.isalnum():
+            return None
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, data):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _persist(self, job):
+        self._write(self._path(job.id), job.to_dict())
+
+    def _expire_orphan(self, path, data):
+        """Posao u toku čiji proces više ne postoji → greška, da klijent ne čeka zauvijek."""
+        if data.get("status") in ACTIVE_STATUSES and not pid_alive(data.get("pid")):
+            data.update(status="error", error="Worker koji je radio posao je prekinut.", finished_at=time.time())
+            self._write(path, data)
+        return data
+
+    def _prune(self):
+        now = time.time()
+        cutoff = now - self.keep_seconds
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job.finished_at and job.finished_at < cutoff:
+                    del self._jobs[job_id]
+            if now - self._pruned_at < self.prune_interval:
+                return
+            self._pruned_at = now
+            own = set(self._jobs)
+
+        # 🧹 Fajlovi svih workera: stari završeni se brišu, napušteni (mrtav worker) se završavaju
+        try:
+            names = os.listdir(self.jobs_dir)
+        except OSError:
+            return
+        for name in names:
+            job_id, ext = os.path.splitext(name)
+            if ext != ".json" or job_id in own:
+                continue
+            path = os.path.join(self.jobs_dir, name)
+            data = self._read(path)
+            if data is None:
+                continue
+            data = self._expire_orphan(path, data)
+            if data.get("finished_at") and data["finished_at"] < cutoff:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,202 @@
+# 📁 modules/utils/metrics.py
+import io
+import os
+import json
+import time
+import bisect
+import cProfile
+import pstats
+import functools
+import threading
+from collections import deque
+
+# ⚙️ SPAN_LOG=1 → svaki span se ispisuje kao JSON linija
+SPAN_LOG = os.environ.get("SPAN_LOG", "0") == "1"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+_collectors = []
+_recent_spans = deque(maxlen=500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Prometheus counter (samo raste); vrijednosti po kombinaciji labela."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(n, "")) for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _label_text(self.labelnames, key), value
+
+
+class Histogram:
+    """Prometheus histogram sa kumulativnim bucketima, _sum i _count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _label_text(self.labelnames, key, {"le": le}), cumulative
+            yield f"{self.name}_sum", _label_text(self.labelnames, key), total
+            yield f"{self.name}_count", _label_text(self.labelnames, key), count
+
+
+class Gauge(Counter):
+    """Gauge čija se vrijednost postavlja (npr. iz collectora pri renderu)."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+def register_collector(func):
+    """func() se poziva prije svakog rendera (npr. za prepis brojača iz keša u gauge)."""
+    _collectors.append(func)
+    return func
+
+def render():
+    """Tekstualni Prometheus format (text/plain; version=0.0.4)."""
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception:
+            pass
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# 📊 Metrike aplikacije
+SPAN_SECONDS = Histogram("ta_span_seconds", "Trajanje instrumentiranih koraka", ["span"])
+SPAN_ERRORS = Counter("ta_span_errors_total", "Koraci završeni izuzetkom", ["span"])
+UPSTREAM_REQUESTS = Counter("ta_upstream_requests_total", "Zahtjevi prema vanjskim servisima", ["upstream", "outcome"])
+CACHE_REQUESTS = Counter("ta_cache_requests_total", "Pogoci i promašaji keševa", ["cache", "result"])
+BYTES_PARSED = Counter("ta_bytes_parsed_total", "Bajtovi COT teksta prošli kroz parser", ["source"])
+BYTES_WRITTEN = Counter("ta_bytes_written_total", "Bajtovi snimljenih izlaznih fajlova", ["format"])
+HTTP_SECONDS = Histogram("ta_http_request_seconds", "Trajanje HTTP zahtjeva", ["method", "endpoint", "status"])
+
+
+class span:
+    """Mjeri blok koda: histogram po nazivu, brojač grešaka i lista zadnjih spanova.
+
+    Klasa umjesto @contextmanager – span je na vrućem putu (po COT bloku).
+    """
+
+    __slots__ = ("name", "fields", "started")
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        SPAN_SECONDS.observe(elapsed, span=self.name)
+        record = {"span": self.name, "seconds": elapsed, "at": time.time(), **self.fields}
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+            SPAN_ERRORS.inc(span=self.name)
+        _recent_spans.append(record)
+        if SPAN_LOG:
+            print(json.dumps(record, default=str))
+        return False
+
+def observe_span(name, seconds, **fields):
+    """Span izmjeren negdje drugdje (npr. u procesu za parsiranje)."""
+    SPAN_SECONDS.observe(seconds, span=name)
+    _recent_spans.append({"span": name, "seconds": seconds, "at": time.time(), **fields})
+
+def timed(name):
+    """Dekorator: cijeli poziv funkcije je jedan span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def recent_spans(limit=100, since=None):
+    spans = list(_recent_spans)
+    if since is not None:
+        spans = [s for s in spans if s["at"] >= since]
+    return spans[-limit:]
+
+
+# 🔬 Profilisanje jednog zahtjeva/posla
+def profile_stats(profiler, limit=40):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+def profile_call(func, limit=40):
+    """(rezultat, izvještaj) – cProfile za thread koji poziva + spanovi iz svih threadova."""
+    started = time.time()
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func)
+    return result, {"cprofile": profile_stats(profiler, limit), "spans": recent_spans(limit=500, since=started)}
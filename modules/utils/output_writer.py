@@ -0,0 +1,196 @@
+# 📁 modules/utils/output_writer.py
+import os
+import gzip
+import json
+import mimetypes
+import threading
+
+from modules.utils.metrics import BYTES_WRITTEN, span
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# ⚙️ Format izlaznih fajlova: json (stari, uvučeni dokument), ndjson (zapis po liniji), msgpack
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "json").lower()
+OUTPUT_GZIP = os.environ.get("OUTPUT_GZIP", "0") == "1"
+
+EXTENSIONS = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "msgpack": ".msgpack",
+}
+CONTENT_TYPES = {
+    ".json": "application/json",
+    ".ndjson": "application/x-ndjson",
+    ".msgpack": "application/msgpack",
+    ".gz": "application/gzip",
+}
+for ext, mimetype in CONTENT_TYPES.items():
+    mimetypes.add_type(mimetype, ext)
+
+# Dokument = meta polja + lista zapisa; "layout" kaže kako se zapisi vraćaju u stari oblik
+LAYOUT_ENTRIES = "entries"        # {"collected_at": ..., "entries": [zapis, ...]}
+LAYOUT_TIMEFRAMES = "timeframes"  # {"1m": {...}, "5m": {...}, "collected_at": ...}
+META_KEY = "_meta"
+
+
+def require_msgpack():
+    # Traženi format se ne mijenja potiho – fajl s drugom ekstenzijom ne bi našao niko ko ga očekuje
+    if msgpack is None:
+        raise ImportError("msgpack format traži paket msgpack – instaliraj ga (pip install -r requirements.txt)")
+
+def resolve_format(fmt=None):
+    fmt = (fmt or OUTPUT_FORMAT).lower()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Nepoznat izlazni format: {fmt}")
+    if fmt == "msgpack":
+        require_msgpack()
+    return fmt
+
+def output_path(folder, stem, fmt=None, compress=None):
+    """Putanja izlaznog fajla; format i gzip se vide iz ekstenzije."""
+    fmt = resolve_format(fmt)
+    compress = OUTPUT_GZIP if compress is None else compress
+    return os.path.join(str(folder), f"{stem}{EXTENSIONS[fmt]}" + (".gz" if compress else ""))
+
+def path_format(path):
+    """(format, gzip) iz ekstenzije fajla."""
+    path = str(path)
+    compressed = path.endswith(".gz")
+    if compressed:
+        path = path[:-3]
+    for fmt, ext in EXTENSIONS.items():
+        if path.endswith(ext):
+            return fmt, compressed
+    return "json", compressed
+
+def content_type(path):
+    fmt, compressed = path_format(path)
+    if compressed:
+        return CONTENT_TYPES[".gz"]
+    if str(path).endswith(EXTENSIONS[fmt]):
+        return CONTENT_TYPES[EXTENSIONS[fmt]]
+    return mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+
+def _open(path, mode, compressed):
+    encoding = None if "b" in mode else "utf-8"
+    if compressed:
+        return gzip.open(path, mode, compresslevel=6, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+# 💾 Pisanje
+def to_records(data, layout):
+    """Stari dokument → (meta, zapisi)."""
+    if layout == LAYOUT_ENTRIES:
+        meta = {k: v for k, v in data.items() if k != "entries"}
+        return meta, data.get("entries", [])
+    meta = {k: v for k, v in data.items() if not isinstance(v, dict)}
+    records = ({"timeframe": k, **v} for k, v in data.items() if isinstance(v, dict))
+    return meta, records
+
+def write_output(path, meta, records, layout=LAYOUT_ENTRIES, indent=2):
+    """Snima meta + zapise u formatu iz ekstenzije.
+
+    ndjson i msgpack pišu zapis po zapis čim stigne (records može biti generator),
+    pa memorija ne raste s veličinom izvještaja. json zadržava stari uvučeni dokument.
+    """
+    fmt, compressed = path_format(path)
+    folder = os.path.dirname(str(path))
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with span("file_write", path=str(path), format=fmt):
+        _write(path, fmt, compressed, meta, records, layout, indent)
+    BYTES_WRITTEN.inc(os.path.getsize(path), format=fmt + (".gz" if compressed else ""))
+    return str(path)
+
+def _write(path, fmt, compressed, meta, records, layout, indent):
+    # Privremeni fajl po procesu i threadu – dva posla koja snimaju isti simbol ne dijele tmp
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        if fmt == "json":
+            records = list(records)
+            if layout == LAYOUT_ENTRIES:
+                document = {**meta, "entries": records}
+            else:
+                document = {r["timeframe"]: {k: v for k, v in r.items() if k != "timeframe"} for r in records}
+                document.update(meta)
+            with _open(tmp, "wt", compressed) as f:
+                json.dump(document, f, indent=indent)
+
+        elif fmt == "ndjson":
+            with _open(tmp, "wt", compressed) as f:
+                f.write(json.dumps({META_KEY: {**meta, "layout": layout}}, separators=(",", ":")) + "\n")
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+        else:
+            packer = msgpack.Packer()
+            with _open(tmp, "wb", compressed) as f:
+                f.write(packer.pack({META_KEY: {**meta, "layout": layout}}))
+                for record in records:
+                    f.write(packer.pack(record))
+
+        os.replace(tmp, path)
+    except BaseException:
+        # Generator zapisa (ili serializacija) pukne usred pisanja – polovičan tmp ne ostaje u output_files
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_document(path, data, layout=LAYOUT_ENTRIES, indent=2):
+    meta, records = to_records(data, layout)
+    return write_output(path, meta, records, layout, indent)
+
+
+# 📖 Čitanje
+def iter_records(path):
+    """Generator (meta, zapis) – za ndjson/msgpack čita zapis po zapis."""
+    fmt, compressed = path_format(path)
+    if fmt == "json":
+        with _open(path, "rt", compressed) as f:
+            data = json.load(f)
+        layout = LAYOUT_ENTRIES if "entries" in data else LAYOUT_TIMEFRAMES
+        meta, records = to_records(data, layout)
+        meta["layout"] = layout
+        for record in records:
+            yield meta, record
+        return
+
+    if fmt == "ndjson":
+        with _open(path, "rt", compressed) as f:
+            meta = json.loads(f.readline())[META_KEY]
+            for line in f:
+                if line.strip():
+                    yield meta, json.loads(line)
+        return
+
+    require_msgpack()
+    with _open(path, "rb", compressed) as f:
+        unpacker = msgpack.Unpacker(f, raw=False)
+        meta = next(unpacker)[META_KEY]
+        for record in unpacker:
+            yield meta, record
+
+def read_output(path):
+    """Vraća dokument u starom obliku, bez obzira na format."""
+    fmt, compressed = path_format(path)
+    if fmt == "json":
+        with _open(path, "rt", compressed) as f:
+            return json.load(f)
+
+    meta, records = {}, []
+    for meta, record in iter_records(path):
+        records.append(record)
+    meta = dict(meta)
+    layout = meta.pop("layout", LAYOUT_ENTRIES)
+    if layout == LAYOUT_ENTRIES:
+        return {**meta, "entries": records}
+    document = {r.pop("timeframe"): r for r in records}
+    document.update(meta)
+    return document
@@ -1,7 +1,7 @@
 # 📁 modules/utils/save_technical_analysis_json.py
 import os
-import json
 from datetime import datetime
+from modules.utils.output_writer import LAYOUT_TIMEFRAMES, output_path, write_document
 
 def save_json_data(symbol: str, data: dict, filename: str = None):
     timestamp = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
@@ -11,10 +11,12 @@ def save_json_data(symbol: str, data: dict, filename: str = None):
     if filename is None:
         filename = f"{symbol}_technical_full.json"
 
-    file_path = os.path.join(folder_path, filename)
+    # Format (json/ndjson/msgpack, gzip) bira output_writer; ekstenzija se prilagođava
+    stem = filename[:-len(".json")] if filename.endswith(".json") else filename
+    file_path = output_path(folder_path, stem)
     data["collected_at"] = timestamp
 
-    with open(file_path, "w") as f:
-        json.dump(data, f, indent=4)
+    write_document(file_path, data, layout=LAYOUT_TIMEFRAMES, indent=4)
 
     print(f"✅ Snimljeno u: {file_path}")
+    return file_path
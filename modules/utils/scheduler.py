@@ -0,0 +1,98 @@
+# 📁 modules/utils/scheduler.py
+import os
+import time
+import heapq
+import threading
+import traceback
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from modules.utils.ta_cache import next_candle_close
+
+# 🗓️ CFTC objavljuje COT petkom u 15:30 po njujorškom vremenu
+CFTC_TZ = ZoneInfo("America/New_York")
+CFTC_RELEASE_WEEKDAY = 4
+CFTC_RELEASE_TIME = (15, 30)
+
+def next_ta_refresh(timeframes, now=None, delay=5):
+    """Prvo sljedeće zatvaranje svijeće među timeframeovima, plus kratko kašnjenje."""
+    now = time.time() if now is None else now
+    return min(next_candle_close(tf, now) for tf in timeframes) + delay
+
+def next_cot_release(now=None, delay_minutes=10):
+    """Unix vrijeme sljedećeg CFTC izdanja (petak 15:30 ET) plus kašnjenje."""
+    now = time.time() if now is None else now
+    local = datetime.fromtimestamp(now, CFTC_TZ)
+    hour, minute = CFTC_RELEASE_TIME
+    release = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    release += timedelta(days=(CFTC_RELEASE_WEEKDAY - local.weekday()) % 7, minutes=delay_minutes)
+    if release.timestamp() <= now:
+        release += timedelta(days=7)
+    return release.timestamp()
+
+def acquire_leader_lock(path):
+    """Samo jedan proces (npr. jedan od gunicorn workera) pokreće scheduler.
+
+    Vraća otvoren fajl koji drži lock, ili None ako ga drži drugi proces.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return open(path, "a")
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class Scheduler:
+    """Jednostavan scheduler: svaki posao ima funkciju za sljedeće vrijeme pokretanja."""
+
+    def __init__(self):
+        self._jobs = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, next_run, func, run_on_start=False):
+        self._jobs.append((name, next_run, func, run_on_start))
+
+    def _run_job(self, name, func):
+        started = time.time()
+        print(f"⏰ Scheduler pokreće: {name}")
+        try:
+            func()
+            print(f"✅ Scheduler završio: {name} ({time.time() - started:.1f}s)")
+        except Exception:
+            print(f"❌ Scheduler greška u poslu: {name}")
+            traceback.print_exc()
+
+    def run_forever(self):
+        queue = []
+        now = time.time()
+        for idx, (name, next_run, func, run_on_start) in enumerate(self._jobs):
+            heapq.heappush(queue, (now if run_on_start else next_run(now), idx))
+
+        while queue and not self._stop.is_set():
+            due, idx = queue[0]
+            wait = due - time.time()
+            if wait > 0:
+                self._stop.wait(min(wait, 60))
+                continue
+            heapq.heappop(queue)
+            name, next_run, func, _ = self._jobs[idx]
+            self._run_job(name, func)
+            heapq.heappush(queue, (next_run(time.time()), idx))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name="scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
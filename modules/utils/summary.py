@@ -0,0 +1,167 @@
+# 📁 modules/utils/summary.py
+import os
+import json
+import threading
+
+from modules.utils.output_writer import read_output
+
+SUFFIX = ".summary.json"
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class AnalysisResult:
+    """Rezultat analize: putanja glavnog fajla, njegov sažetak i svi snimljeni fajlovi."""
+
+    __slots__ = ("path", "summary", "outputs")
+
+    def __init__(self, path, summary, outputs=None):
+        self.path = path
+        self.summary = summary
+        self.outputs = outputs or {path: summary}
+
+    def __repr__(self):
+        return f"AnalysisResult({self.path!r}, outputs={len(self.outputs)})"
+
+
+# 📌 Projekcije – samo ono što se prikazuje
+# Fiksne kolone TA tabele – timeframe s greškom ostaje u svojoj koloni
+TA_TIMEFRAMES = ("1m", "5m", "15m", "30m", "1h", "4h", "1d")
+
+def ta_recommendation(content):
+    if not isinstance(content, dict):
+        return "N/A"
+    if "summary" in content:
+        return content["summary"].get("RECOMMENDATION", "N/A")
+    return "ERROR" if "error" in content else "N/A"
+
+def ta_summary(data):
+    return {
+        "kind": "ta",
+        "timeframes": {tf: ta_recommendation(data.get(tf)) for tf in TA_TIMEFRAMES},
+    }
+
+def cot_summary(data):
+    if not data.get("entries"):
+        return {"kind": "cot", "market": None}
+    entry = data["entries"][0]
+    return {
+        "kind": "cot",
+        "market": entry["market"],
+        "open_interest": entry["open_interest"],
+        "groups": [
+            {
+                "group": g["group"],
+                "net": g["analysis"].get("net", 0),
+                "dominance": g["analysis"].get("dominance", "-"),
+                "alert_level": g["analysis"].get("alert_level", "-"),
+                "long_pct": g["percentages"].get("long_pct", 0),
+                "short_pct": g["percentages"].get("short_pct", 0),
+                "traders": g.get("traders", 0),
+            }
+            for g in entry["groups"]
+        ],
+    }
+
+def combined_summary(data):
+    """TA + COT sažetak jednog simbola iz spojenog fajla."""
+    return {
+        "kind": "combined",
+        "symbol": data.get("symbol"),
+        "ta": ta_summary(data["ta"]) if data.get("ta") else None,
+        "cot": cot_summary(data),
+    }
+
+def summarize(data):
+    """Sažetak iz punog sadržaja fajla (za fajlove bez snimljenog sažetka)."""
+    if "ta" in data and "entries" in data:
+        return combined_summary(data)
+    if "1m" in data:
+        return ta_summary(data)
+    if "entries" in data:
+        return cot_summary(data)
+    return {"kind": "unknown"}
+
+
+# 💾 Keš sažetaka uz fajl, ključ (putanja, mtime)
+def store_summary(path, summary):
+    mtime = os.path.getmtime(path)
+    tmp = f"{path}{SUFFIX}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"mtime": mtime, "summary": summary}, f)
+    os.replace(tmp, f"{path}{SUFFIX}")
+    with _lock:
+        _cache[path] = (mtime, summary)
+    return summary
+
+def get_summary(path):
+    mtime = os.path.getmtime(path)
+    with _lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(f"{path}{SUFFIX}", "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("mtime") == mtime:
+            summary = sidecar["summary"]
+            with _lock:
+                _cache[path] = (mtime, summary)
+            return summary
+    except (OSError, ValueError):
+        pass
+
+    # Stari fajl bez sažetka – jednom pročitaj cijeli i zapamti projekciju
+    return store_summary(path, summarize(read_output(path)))
+
+
+# 🖼️ HTML
+CELL = "padding: 8px; border: 1px solid #ccc;"
+
+def render_summary(summary):
+    if summary.get("kind") == "combined":
+        parts = [f"<p><strong>📈 {summary['symbol']}</strong></p>"]
+        for part in (summary["ta"], summary["cot"]):
+            html = render_summary(part) if part else None
+            parts.append(html or "<p><em>⚠️ Nema podataka</em></p>")
+        return "".join(parts)
+
+    if summary.get("kind") == "ta":
+        items = [f"<li><strong>{tf}</strong>: {rec}</li>" for tf, rec in summary["timeframes"].items()]
+        return "<ul>" + "".join(items) + "</ul>"
+
+    if summary.get("kind") == "cot" and summary.get("market"):
+        rows = []
+        for g in summary["groups"]:
+            dom = g["dominance"]
+            alert = g["alert_level"]
+            emoji_dom = "🟢" if dom == "bullish" else "🔴" if dom == "bearish" else "⚪"
+            emoji_alert = "🔴" if alert == "high" else "🟠" if alert == "medium" else "🟢"
+            rows.append(
+                "<tr>"
+                f"<td>{g['group']}</td>"
+                f"<td style='text-align:right;'>{g['net']:+}</td>"
+                f"<td>{emoji_dom} {dom.capitalize()}</td>"
+                f"<td>{emoji_alert} {alert.capitalize()}</td>"
+                f"<td>{(g['long_pct'] or 0):.1f}%</td>"
+                f"<td>{(g['short_pct'] or 0):.1f}%</td>"
+                f"<td>{g['traders']}</td>"
+                "</tr>"
+            )
+        headers = [
+            ("left", "Grupa"), ("right", "Net pozicija"), ("left", "Dominacija"), ("left", "Upozorenje"),
+            ("right", "% Long"), ("right", "% Short"), ("right", "Broj Trgovaca"),
+        ]
+        head = "".join(f"<th style='text-align:{align}; {CELL}'>{title}</th>" for align, title in headers)
+        return (
+            f"<p><strong>📌 Tržište:</strong> {summary['market']}<br>"
+            f"<strong>📅 Open interest:</strong> {summary['open_interest']}</p>"
+            "<table style=\"border-collapse: collapse; width: 100%; font-size: 14px;\">"
+            f"<thead style=\"background-color: #f3f4f6;\"><tr>{head}</tr></thead>"
+            f"<tbody>{''.join(rows)}</tbody>"
+            "</table>"
+        )
+
+    return None
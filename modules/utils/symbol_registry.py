@@ -0,0 +1,117 @@
+# 📁 modules/utils/symbol_registry.py
+import os
+import re
+import json
+import difflib
+import threading
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           "sources", "symbols_config.json")
+
+NON_ALNUM = re.compile(r"[^A-Z0-9]")
+
+def lookup_key(name):
+    """'eur-usd', 'EUR/USD', 'Euro FX' → 'EURUSD' / 'EUROFX'."""
+    return NON_ALNUM.sub("", str(name).upper())
+
+
+class SymbolRegistry:
+    """Jedan indeks simbola za oba fetchera i app.
+
+    symbols_config.json se čita jednom i ponovo samo kad se promijeni mtime.
+    Lookup je O(1) po kanonskom imenu, aliasu, TradingView tickeru (i EXCHANGE:TICKER)
+    i nazivu COT izvještaja.
+    """
+
+    def __init__(self, path=CONFIG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._config = {}
+        self._index = {}
+
+    def _ensure_loaded(self):
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            self._config, self._index = config, self._build_index(config)
+            self._mtime = mtime
+
+    @staticmethod
+    def _build_index(config):
+        index = {}
+        # Redoslijed prioriteta: kanonsko ime > alias > ticker > COT report – prvi upis pobjeđuje
+        for label in config:
+            index.setdefault(lookup_key(label), label)
+        for label, info in config.items():
+            for alias in info.get("aliases", []):
+                index.setdefault(lookup_key(alias), label)
+        for label, info in config.items():
+            ticker = info.get("map", {}).get("tradingview_ta_v2")
+            if ticker:
+                index.setdefault(lookup_key(ticker), label)
+                for exchange in info.get("exchanges", []):
+                    index.setdefault(lookup_key(f"{exchange}:{ticker}"), label)
+        for label, info in config.items():
+            report_name = info.get("cot", {}).get("report_name")
+            if report_name:
+                index.setdefault(lookup_key(report_name), label)
+        return index
+
+    def config(self):
+        self._ensure_loaded()
+        return self._config
+
+    def labels(self):
+        return list(self.config())
+
+    def get(self, name):
+        """(label, info) ili None."""
+        self._ensure_loaded()
+        label = self._index.get(lookup_key(name))
+        if label is None:
+            return None
+        return label, self._config[label]
+
+    def canonical(self, name):
+        found = self.get(name)
+        return found[0] if found else None
+
+    def resolve(self, selected_input):
+        """Lista (label, info) bez duplikata, redoslijedom unosa; 'ALL' = svi simboli."""
+        config = self.config()
+        if "ALL" in [s.upper() for s in selected_input]:
+            return list(config.items())
+        selected, seen = [], set()
+        for name in selected_input:
+            found = self.get(name)
+            if found and found[0] not in seen:
+                seen.add(found[0])
+                selected.append(found)
+        return selected
+
+    def suggest(self, query, limit=10):
+        """Prijedlozi za formu: prvo prefiks, pa približno poklapanje (difflib)."""
+        self._ensure_loaded()
+        key = lookup_key(query)
+        if not key:
+            return self.labels()[:limit]
+
+        matches = []
+        for name, label in self._index.items():
+            if name.startswith(key) and label not in matches:
+                matches.append(label)
+        if len(matches) < limit:
+            for name in difflib.get_close_matches(key, list(self._index), n=limit, cutoff=0.6):
+                label = self._index[name]
+                if label not in matches:
+                    matches.append(label)
+        return matches[:limit]
+
+
+SYMBOLS = SymbolRegistry()
@@ -0,0 +1,144 @@
+# 📁 modules/utils/ta_cache.py
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from modules.utils.metrics import CACHE_REQUESTS
+
+# ⏱️ Trajanje svijeće u sekundama po TradingView intervalu
+CANDLE_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+def next_candle_close(interval, now=None):
+    """Unix timestamp sljedećeg zatvaranja svijeće (UTC poravnanje)."""
+    now = time.time() if now is None else now
+    seconds = CANDLE_SECONDS.get(interval)
+    if seconds is None:
+        # Nepoznat interval (1W, 1M) – drži jedan dan
+        seconds = CANDLE_SECONDS["1d"]
+    return (int(now) // seconds + 1) * seconds
+
+
+class TACache:
+    """LRU keš TA rezultata, ključ (symbol, exchange, screener, interval).
+
+    Svaki unos ističe na zatvaranju tekuće svijeće za svoj interval.
+    Uz snapshot_path keš se može dijeliti među procesima: scheduler snima
+    snapshot, a ostali procesi ga učitaju kad im nešto nedostaje.
+    """
+
+    def __init__(self, max_size=512, snapshot_path=None):
+        self.max_size = max_size
+        self.snapshot_path = snapshot_path
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._snapshot_mtime = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(symbol, exchange, screener, interval):
+        return (symbol.upper(), exchange.upper(), screener.lower(), interval)
+
+    def get(self, key, now=None):
+        now = time.time() if now is None else now
+        item = self._data.get(key)
+        if item is None or item[0] <= now:
+            self.load_snapshot(now)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="ta", result="miss")
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                # Istekli unos ostaje (LRU ga izbaci) – get_stale ga vraća dok upstream ne radi
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="ta", result="miss")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="ta", result="hit")
+            return value
+
+    def get_stale(self, key):
+        """Zadnja dobra vrijednost bez obzira na istek (za circuit breaker fallback)."""
+        with self._lock:
+            item = self._data.get(key)
+        return item[1] if item is not None else None
+
+    def set(self, key, value, now=None):
+        # Greške se ne keširaju – sljedeći zahtjev pokušava ponovo
+        if not value or "error" in value:
+            return
+        expires_at = next_candle_close(key[3], now)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def save_snapshot(self, now=None):
+        """Snima sve još važeće unose u snapshot_path (atomski)."""
+        if not self.snapshot_path:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            items = [[list(k), exp, v] for k, (exp, v) in self._data.items() if exp > now]
+        folder = os.path.dirname(self.snapshot_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def load_snapshot(self, now=None):
+        """Učitava snapshot ako se promijenio od zadnjeg čitanja."""
+        if not self.snapshot_path:
+            return
+        try:
+            mtime = os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return
+        if mtime == self._snapshot_mtime:
+            return
+        now = time.time() if now is None else now
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._snapshot_mtime = mtime
+            for key, expires_at, value in items:
+                key = tuple(key)
+                current = self._data.get(key)
+                if expires_at > now and (current is None or current[0] < expires_at):
+                    self._data[key] = (expires_at, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+TA_CACHE = TACache(
+    max_size=int(os.environ.get("TA_CACHE_SIZE", "512")),
+    snapshot_path=os.environ.get("TA_CACHE_SNAPSHOT", os.path.join("output_files", "ta_cache.json")),
+)
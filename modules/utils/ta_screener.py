@@ -0,0 +1,238 @@
+# 📁 modules/utils/ta_screener.py
+import os
+import re
+import difflib
+import threading
+
+import numpy as np
+
+from modules.utils.metrics import span
+from modules.utils.output_writer import read_output
+
+# 🧮 Polja iz summary bloka, ispred TradingView indikatora
+RECOMMENDATIONS = {"STRONG_SELL": -2, "SELL": -1, "NEUTRAL": 0, "BUY": 1, "STRONG_BUY": 2}
+SUMMARY_FIELDS = ["REC", "BUY", "SELL", "NEUTRAL"]
+
+# 🔤 Tokeni izraza: `ADX+DI`@1h ili RSI@1h, brojevi, BUY/SELL..., and/or/not, poređenja i aritmetika
+TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | `(?P<quoted>[^`]+)`@(?P<quoted_tf>\w+)
+  | (?P<ref>[A-Za-z_][\w.]*(?:\[\d+\])?)@(?P<ref_tf>\w+)
+  | (?P<number>\d+(?:\.\d*)?|\.\d+)
+  | (?P<word>[A-Za-z_]+)
+  | (?P<op><=|>=|==|!=|<|>|&|\||~|\+|-|\*|/|\(|\))
+""", re.VERBOSE)
+KEYWORDS = {"and", "or", "not"}
+
+OUTPUT_PATTERN = re.compile(r"^(?P<stem>.+)_technical_full\.(?:json|ndjson|msgpack)(?:\.gz)?$")
+
+
+class TAMatrix:
+    """Zadnji TA rezultati svih simbola kao jedan NumPy niz (simbol × timeframe × indikator).
+
+    REC (-2..2), BUY/SELL/NEUTRAL iz summary bloka su prva "indikator" polja.
+    Filter i rang se računaju nad cijelim stupcem odjednom, bez čitanja fajlova.
+    """
+
+    def __init__(self, timeframes, indicators):
+        self.timeframes = list(timeframes)
+        self.indicators = SUMMARY_FIELDS + [i for i in indicators if i not in SUMMARY_FIELDS]
+        self._tf_index = {tf: n for n, tf in enumerate(self.timeframes)}
+        self._ind_index = {name: n for n, name in enumerate(self.indicators)}
+        self.symbols = []
+        self._sym_index = {}
+        self._values = np.full((0, len(self.timeframes), len(self.indicators)), np.nan)
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _row(self, symbol):
+        n = self._sym_index.get(symbol)
+        if n is not None:
+            return n
+        n = len(self.symbols)
+        if n == len(self._values):
+            # Kapacitet se udvostručuje – dodavanje simbola nije kopija cijelog niza svaki put
+            grown = np.full((max(8, 2 * n),) + self._values.shape[1:], np.nan)
+            grown[:n] = self._values[:n]
+            self._values = grown
+        self.symbols.append(symbol)
+        self._sym_index[symbol] = n
+        return n
+
+    def update(self, symbol, full_data, mtime=None):
+        """Upisuje {tf: {summary, indicators}} jednog simbola (greške/nepostojeći tf → NaN)."""
+        with self._lock:
+            n = self._row(symbol)
+            row = self._values[n]
+            row[:] = np.nan
+            for tf, data in full_data.items():
+                t = self._tf_index.get(tf)
+                if t is None or not isinstance(data, dict) or "summary" not in data:
+                    continue
+                summary = data["summary"]
+                row[t, 0] = RECOMMENDATIONS.get(summary.get("RECOMMENDATION"), np.nan)
+                for n, field in enumerate(SUMMARY_FIELDS[1:], start=1):
+                    row[t, n] = _number(summary.get(field))
+                for name, value in (data.get("indicators") or {}).items():
+                    i = self._ind_index.get(name)
+                    if i is not None:
+                        row[t, i] = _number(value)
+            if mtime is not None:
+                self._mtimes[symbol] = mtime
+
+    def sync(self, folder, resolve=None):
+        """Učitava izlazne TA fajlove novije od onoga što je već u matrici (npr. iz schedulera)."""
+        newest = {}
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            return 0
+        for entry in entries:
+            m = OUTPUT_PATTERN.match(entry.name)
+            if not m:
+                continue
+            symbol = (resolve(m.group("stem")) if resolve else None) or m.group("stem")
+            mtime = entry.stat().st_mtime
+            if symbol not in newest or newest[symbol][0] < mtime:
+                newest[symbol] = (mtime, entry.path)
+
+        loaded = 0
+        for symbol, (mtime, path) in newest.items():
+            if self._mtimes.get(symbol, 0) >= mtime:
+                continue
+            try:
+                data = read_output(path)
+            except (OSError, ValueError):
+                continue
+            self.update(symbol, data, mtime)
+            loaded += 1
+        return loaded
+
+    def column(self, indicator, timeframe):
+        """Jedan stupac (svi simboli) – view u matricu, bez kopiranja."""
+        i = self._ind_index.get(indicator)
+        if i is None:
+            raise ValueError(f"Nepoznat indikator: {indicator}{_hint(indicator, self.indicators)}")
+        t = self._tf_index.get(timeframe)
+        if t is None:
+            raise ValueError(f"Nepoznat timeframe: {timeframe} (dostupni: {', '.join(self.timeframes)})")
+        return self._values[:len(self.symbols), t, i]
+
+    def screen(self, where=None, rank=None, ascending=False, limit=50):
+        """Filter i rang nad svim simbolima u jednom vektorskom prolazu.
+
+        where: npr. "RSI@1h < 30 and REC@4h >= BUY"; rank: npr. "ADX@1d" ili "RSI@1h - RSI[1]@1h".
+        Nazivi sa +/- idu u backtickove: `ADX+DI`@4h. Vraća listu {symbol, score, values}.
+        """
+        # pandas (DataFrame.eval) tek pri prvom screeningu – ne usporava import fetchera
+        import pandas as pd
+
+        with self._lock, span("ta_screen", symbols=len(self.symbols)):
+            count = len(self.symbols)
+            refs = {}
+            where_expr = compile_expression(where, refs) if where else None
+            rank_expr = compile_expression(rank, refs) if rank else None
+            frame = pd.DataFrame({name: self.column(ind, tf) for (ind, tf), name in refs.items()}, index=range(count))
+
+            mask = np.ones(count, dtype=bool)
+            if where_expr:
+                mask = _evaluate(frame, where_expr, count)
+                if mask.dtype != bool:
+                    raise ValueError("filter mora biti poređenje, npr. RSI@1h < 30")
+            scores = _evaluate(frame, rank_expr, count).astype("float64") if rank_expr else np.full(count, np.nan)
+
+            matched = np.flatnonzero(mask)
+            if rank_expr:
+                # NaN rang ide na kraj u oba smjera
+                keys = scores[matched] if ascending else -scores[matched]
+                matched = matched[np.argsort(np.where(np.isnan(keys), np.inf, keys), kind="stable")]
+            matched = matched[:limit] if limit else matched
+
+            columns = {f"{ind}@{tf}": frame[name].to_numpy() for (ind, tf), name in refs.items()}
+            results = []
+            for n in matched.tolist():
+                results.append({
+                    "symbol": self.symbols[n],
+                    "score": _clean(scores[n]),
+                    "values": {label: _clean(values[n]) for label, values in columns.items()},
+                })
+            return {"symbols": count, "matched": int(mask.sum()), "results": results}
+
+
+def compile_expression(expression, refs):
+    """Izraz → pandas eval izraz nad kolonama c0, c1, ...; refs: {(indikator, tf): kolona}.
+
+    Dozvoljeni su samo tokeni iz TOKEN – nema poziva funkcija ni pristupa atributima.
+    """
+    out = []
+    pos = 0
+    for m in TOKEN.finditer(expression):
+        if m.start() != pos:
+            break
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "space":
+            continue
+        if kind in ("quoted_tf", "ref_tf"):
+            ind, tf = (m.group("quoted"), m.group("quoted_tf")) if m.group("quoted") else (m.group("ref"), m.group("ref_tf"))
+            name = refs.setdefault((ind, tf), f"c{len(refs)}")
+            out.append(name)
+        elif kind == "number":
+            out.append(m.group())
+        elif kind == "word":
+            word = m.group()
+            if word.lower() in KEYWORDS:
+                out.append(word.lower())
+            elif word.upper() in RECOMMENDATIONS:
+                out.append(str(RECOMMENDATIONS[word.upper()]))
+            else:
+                raise ValueError(f"Nepoznat naziv '{word}' – indikator ide uz timeframe, npr. {word}@1h")
+        else:
+            out.append(m.group())
+    if pos != len(expression):
+        raise ValueError(f"Neispravan izraz kod: {expression[pos:pos + 20]!r}")
+    if not out:
+        raise ValueError("Prazan izraz")
+    return " ".join(out)
+
+def _evaluate(frame, expression, count):
+    try:
+        result = np.asarray(frame.eval(expression, engine="python"))
+    except Exception as e:
+        raise ValueError(f"Neispravan izraz: {e}") from None
+    # Konstantan izraz (npr. "1") → isti rezultat za sve simbole
+    return np.full(count, result) if result.ndim == 0 else result
+
+def _number(value):
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+def _clean(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def _hint(name, options):
+    close = difflib.get_close_matches(name, options, n=3)
+    return f" (možda: {', '.join(close)})" if close else ""
+
+def parse_request(values):
+    """Parametri iz query stringa ili JSON tijela → kwargs za screen()."""
+    limit = values.get("limit", 50)
+    order = str(values.get("order", "desc")).lower()
+    if order not in ("asc", "desc"):
+        raise ValueError("order mora biti asc ili desc")
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit mora biti broj") from None
+    return {
+        "where": values.get("filter") or None,
+        "rank": values.get("rank") or None,
+        "ascending": order == "asc",
+        "limit": max(0, limit),
+    }
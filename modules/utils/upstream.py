@@ -0,0 +1,219 @@
+# 📁 modules/utils/upstream.py
+import os
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+import requests
+
+from modules.utils.metrics import Counter, Gauge, UPSTREAM_REQUESTS, register_collector, span
+
+UPSTREAM_RETRIES = Counter("ta_upstream_retries_total", "Ponovljeni pokušaji prema upstreamu", ["upstream", "reason"])
+UPSTREAM_REJECTED = Counter("ta_upstream_rejected_total", "Pozivi odbijeni otvorenim circuit breakerom", ["upstream"])
+BREAKER_OPEN = Gauge("ta_circuit_open", "1 ako je circuit breaker otvoren", ["upstream"])
+
+# Statusi nakon kojih ima smisla pokušati ponovo
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(Exception):
+    """Circuit breaker je otvoren ili su svi pokušaji potrošeni."""
+
+
+class TokenBucket:
+    """Rate limiter: `rate` tokena u sekundi, najviše `capacity` odjednom."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Čeka token; vraća False ako ga nema ni nakon `timeout` sekundi."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """closed → (N uzastopnih grešaka) → open → (nakon reset_timeout) → half-open → jedan probni poziv."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def record_error(self):
+        """Izuzetak koji nije mrežna greška (npr. neispravan JSON): probni poziv je neuspješan.
+
+        U closed stanju se ne broji – lokalna greška ne smije otvoriti breaker.
+        """
+        with self._lock:
+            if self._probing:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class UpstreamClient:
+    """Zajednički klijent za jedan upstream host.
+
+    Vlastiti Session (pool konekcija po hostu), strogi timeout, retry sa
+    eksponencijalnim backoffom i jitterom, token bucket i circuit breaker.
+    Kad je breaker otvoren, poziv odmah baca UpstreamUnavailable – pozivalac
+    tada vraća zadnju dobru vrijednost iz svog keša.
+    """
+
+    def __init__(self, name, rate=5, burst=10, timeout=(5, 30), retries=3,
+                 backoff_base=0.5, backoff_cap=8, failure_threshold=5, reset_timeout=60, pool_size=10):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    def backoff(self, attempt, retry_after=None):
+        """Full jitter: slučajno između 0 i min(cap, base * 2^attempt); Retry-After ima prednost."""
+        if retry_after is not None:
+            return min(self.backoff_cap, retry_after)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response):
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def request(self, method, url, parse=None, **kwargs):
+        """Response za 2xx/3xx/4xx (osim 429); baca UpstreamUnavailable kad upstream nije zdrav.
+
+        parse(response) (npr. JSON + obrada) se izvršava prije nego se poziv računa kao
+        uspješan – vraća se njegov rezultat, a izuzetak iz njega obara probni poziv.
+        """
+        if not self.breaker.allow():
+            UPSTREAM_REJECTED.inc(upstream=self.name)
+            raise UpstreamUnavailable(f"{self.name}: circuit breaker otvoren")
+        kwargs.setdefault("timeout", self.timeout)
+
+        try:
+            response = self._send(method, url, **kwargs)
+            result = parse(response) if parse is not None else response
+        except UpstreamUnavailable:
+            raise
+        except BaseException:
+            # Bez ovoga bi half-open breaker ostao zauvijek "u probi" i odbijao sve pozive
+            self.breaker.record_error()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _send(self, method, url, **kwargs):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                wait = self.backoff(attempt - 1, last_error[1])
+                UPSTREAM_RETRIES.inc(upstream=self.name, reason=last_error[0])
+                time.sleep(wait)
+            self.bucket.acquire()
+            try:
+                with span("upstream_request", upstream=self.name, host=urlparse(url).netloc):
+                    response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                UPSTREAM_REQUESTS.inc(upstream=self.name, outcome="error")
+                last_error = (type(e).__name__, None, e)
+                continue
+            if response.status_code in RETRY_STATUSES:
+                UPSTREAM_REQUESTS.inc(upstream=self.name, outcome="error")
+                last_error = (str(response.status_code), self.retry_after(response), response)
+                continue
+            UPSTREAM_REQUESTS.inc(upstream=self.name, outcome="ok")
+            return response
+
+        self.breaker.record_failure()
+        raise UpstreamUnavailable(f"{self.name}: {self.retries + 1} neuspjelih pokušaja ({last_error[0]})")
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def _env(name, default, cast=float):
+    return cast(os.environ.get(name, default))
+
+# 🌐 Klijenti po upstreamu (jedan Session i jedan breaker po hostu)
+TRADINGVIEW = UpstreamClient(
+    "tradingview",
+    rate=_env("TV_RATE_LIMIT", "5"), burst=_env("TV_RATE_BURST", "10"),
+    timeout=(3, _env("TV_READ_TIMEOUT", "10")), retries=_env("TV_RETRIES", "2", int),
+    failure_threshold=5, reset_timeout=_env("TV_BREAKER_RESET", "60"),
+    pool_size=_env("TA_MAX_WORKERS", "8", int),
+)
+CFTC = UpstreamClient(
+    "cftc",
+    rate=_env("CFTC_RATE_LIMIT", "10"), burst=_env("CFTC_RATE_BURST", "10"),
+    timeout=(5, _env("CFTC_READ_TIMEOUT", "60")), retries=_env("CFTC_RETRIES", "2", int),
+    failure_threshold=3, reset_timeout=_env("CFTC_BREAKER_RESET", "300"),
+    pool_size=_env("COT_DOWNLOAD_WORKERS", "6", int),
+)
+
+@register_collector
+def _breaker_state():
+    for client in (TRADINGVIEW, CFTC):
+        BREAKER_OPEN.set(1 if client.breaker.state == "open" else 0, upstream=client.name)
@@ -0,0 +1,55 @@
+import os
+import sys
+import glob
+from modules.utils.scheduler import Scheduler, acquire_leader_lock, next_cot_release, next_ta_refresh
+from modules.utils.ta_cache import TA_CACHE
+
+OUTPUT_FOLDER = "output_files"
+LOCK_PATH = os.path.join(OUTPUT_FOLDER, "scheduler.lock")
+
+# ⚙️ Timeframeovi čija zatvaranja svijeća okidaju TA osvježavanje
+TA_TIMEFRAMES = os.environ.get("SCHEDULER_TA_TIMEFRAMES", "1m,5m,15m,30m,1h,4h,1d").split(",")
+
+def refresh_ta():
+    from tradingview_ta_v2_fetcher import run_ta_analysis
+    # Keš vraća svježe timeframeove, upstream idu samo oni čija je svijeća zatvorena
+    run_ta_analysis(["ALL"], OUTPUT_FOLDER)
+    TA_CACHE.save_snapshot()
+
+def refresh_cot():
+    import cot_fetcher_full
+    from cot_fetcher_custom import COT_INDEX, run_cot_analysis
+    cot_fetcher_full.run_full_report()
+    COT_INDEX.refresh()
+    run_cot_analysis(["ALL"], OUTPUT_FOLDER)
+
+def build_scheduler():
+    scheduler = Scheduler()
+    scheduler.add_job("ta", lambda now: next_ta_refresh(TA_TIMEFRAMES, now), refresh_ta, run_on_start=True)
+    scheduler.add_job("cot", next_cot_release, refresh_cot,
+                      run_on_start=not glob.glob(os.path.join("data", "ai", "full_cot_report.*")))
+    return scheduler
+
+def start_background():
+    """Pokreće scheduler u pozadinskom threadu, samo u procesu koji dobije lock."""
+    lock = acquire_leader_lock(LOCK_PATH)
+    if lock is None:
+        return None
+    scheduler = build_scheduler()
+    scheduler.lock = lock
+    scheduler.start()
+    print(f"⏰ Scheduler pokrenut u procesu {os.getpid()}")
+    return scheduler
+
+# ▶️ MAIN – poseban proces: python scheduler.py [--once]
+if __name__ == "__main__":
+    if "--once" in sys.argv:
+        refresh_ta()
+        refresh_cot()
+        sys.exit(0)
+
+    lock = acquire_leader_lock(LOCK_PATH)
+    if lock is None:
+        print("⚠️ Scheduler već radi u drugom procesu.")
+        sys.exit(1)
+    build_scheduler().run_forever()
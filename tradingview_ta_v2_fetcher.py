@@ -1,73 +1,255 @@
-
 import os
-import json
-import pandas as pd
-from tradingview_ta import TA_Handler, Interval
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import tradingview_ta
+from tradingview_ta import Interval, TradingView
+from tradingview_ta.main import calculate
+from modules.utils.metrics import span
 from modules.utils.save_technical_analysis_json import save_json_data
+from modules.utils.summary import AnalysisResult, get_summary, store_summary, ta_summary
+from modules.utils.symbol_registry import SYMBOLS
+from modules.utils.ta_cache import TA_CACHE, TACache
+from modules.utils.ta_screener import TAMatrix
+from modules.utils.upstream import TRADINGVIEW
+
+# ⚙️ Maksimalan broj istovremenih zahtjeva prema TradingView-u
+MAX_WORKERS = int(os.environ.get("TA_MAX_WORKERS", "8"))
+# ⚙️ Batch mod: jedan scanner zahtjev po screeneru i timeframeu umjesto po simbolu
+BATCH_MODE = os.environ.get("TA_BATCH_MODE", "1") not in ("0", "false", "False")
+
+TIMEFRAMES = {
+    "1m": Interval.INTERVAL_1_MINUTE,
+    "5m": Interval.INTERVAL_5_MINUTES,
+    "15m": Interval.INTERVAL_15_MINUTES,
+    "30m": Interval.INTERVAL_30_MINUTES,
+    "1h": Interval.INTERVAL_1_HOUR,
+    "4h": Interval.INTERVAL_4_HOURS,
+    "1d": Interval.INTERVAL_1_DAY,
+}
+
+# 🧮 Zadnji indikatori svih simbola za screening (simbol × timeframe × indikator)
+TA_MATRIX = TAMatrix(TIMEFRAMES, TradingView.indicators)
 
 def load_config():
-    config_path = os.path.join("sources", "symbols_config.json")
-    with open(config_path, "r") as f:
-        return json.load(f)
+    return SYMBOLS.config()
 
 def normalize_symbol(symbol):
     return symbol.upper().replace("/", "").replace("-", "").replace(" ", "")
 
-def run_ta_analysis(selected_input, output_dir):
-    symbols_config = load_config()
-    normalized_config = {
-        normalize_symbol(k): (k, v) for k, v in symbols_config.items()
-    }
+def resolve_symbols(selected_input):
+    """(label, config) za unos – kanonsko ime, alias ili ticker, preko zajedničkog registra."""
+    return SYMBOLS.resolve(selected_input)
+
+def symbol_params(config):
+    symbol = config["map"]["tradingview_ta_v2"]
+    screener = config.get("screener", "forex")
+    exchanges = config.get("exchanges", [])
+    exchange = exchanges[0] if exchanges else "OANDA"
+    return symbol, screener, exchange
+
+def scan(screener, interval, tickers):
+    """Jedan POST na TradingView scanner kroz zajednički klijent (retry, rate limit, breaker).
+
+    Isti zahtjev i isti calculate() kao TA_Handler/get_multiple_analysis;
+    vraća {"EXCHANGE:SYMBOL": Analysis ili None}.
+    """
+    indicators = TradingView.indicators
+
+    # Obrada odgovora ide kroz klijent – neispravan odgovor na probni poziv ne zatvara breaker
+    def parse(response):
+        if response.status_code != 200:
+            raise Exception(f"Can't access TradingView's API. HTTP status code: {response.status_code}.")
 
-    if "ALL" in [s.upper() for s in selected_input]:
-        selected_symbols = list(normalized_config.values())
-    else:
-        selected_symbols = []
-        for s in selected_input:
-            norm = normalize_symbol(s)
-            if norm in normalized_config:
-                selected_symbols.append(normalized_config[norm])
-
-    timeframes = {
-        "1m": Interval.INTERVAL_1_MINUTE,
-        "5m": Interval.INTERVAL_5_MINUTES,
-        "15m": Interval.INTERVAL_15_MINUTES,
-        "30m": Interval.INTERVAL_30_MINUTES,
-        "1h": Interval.INTERVAL_1_HOUR,
-        "4h": Interval.INTERVAL_4_HOURS,
-        "1d": Interval.INTERVAL_1_DAY,
+        analyses = {ticker.upper(): None for ticker in tickers}
+        for row in response.json()["data"]:
+            exchange, symbol = row["s"].split(":", 1)
+            analyses[row["s"]] = calculate(
+                indicators=dict(zip(indicators, row["d"])), indicators_key=indicators,
+                screener=screener, symbol=symbol, exchange=exchange, interval=interval
+            )
+        return analyses
+
+    return TRADINGVIEW.post(
+        f"{TradingView.scan_url}{screener.lower()}/scan",
+        json=TradingView.data(tickers, interval, indicators),
+        headers={"User-Agent": f"tradingview_ta/{tradingview_ta.__version__}"},
+        parse=parse,
+    )
+
+def analysis_data(analysis):
+    if analysis is None:
+        return {"error": "Exchange or symbol not found."}
+    return {
+        "summary": analysis.summary,
+        "indicators": analysis.indicators
     }
 
+def fetch_timeframe(symbol, screener, exchange, interval):
+    ticker = f"{exchange}:{symbol}".upper()
+    try:
+        with span("tv_get_analysis", symbol=symbol, interval=interval):
+            analysis = scan(screener, interval, [ticker])[ticker]
+        return analysis_data(analysis)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+def remember(cache, key, data):
+    """Uspjeh ide u keš; kod greške (upstream nedostupan) vraća se zadnja dobra vrijednost."""
+    if cache is None:
+        return data
+    if "error" not in data:
+        cache.set(key, data)
+        return data
+    last_good = cache.get_stale(key)
+    if last_good is None:
+        return data
+    return {**last_good, "stale": True}
+
+def ordered(data):
+    """Timeframeovi u standardnom redoslijedu (1m → 1d)."""
+    return {tf: data[tf] for tf in TIMEFRAMES}
+
+def iter_ta_data(selected_symbols, max_workers=MAX_WORKERS, cache=TA_CACHE):
+    """Šalje sve (simbol, timeframe) parove kroz ograničen thread pool.
+
+    Generator (label, {tf: {summary, indicators}}) – simbol se vraća čim su
+    svi njegovi timeframeovi gotovi. Svježi timeframeovi se uzimaju iz keša.
+    """
+    results = {label: {} for label, _ in selected_symbols}
+    remaining = {label: len(TIMEFRAMES) for label, _ in selected_symbols}
+    if not selected_symbols:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {}
+        for label, config in selected_symbols:
+            symbol, screener, exchange = symbol_params(config)
+            for tf_label, interval in TIMEFRAMES.items():
+                key = TACache.make_key(symbol, exchange, screener, interval)
+                cached = cache.get(key) if cache is not None else None
+                if cached is not None:
+                    results[label][tf_label] = cached
+                    remaining[label] -= 1
+                    continue
+                future = pool.submit(fetch_timeframe, symbol, screener, exchange, interval)
+                futures[future] = (label, tf_label, key)
+
+        for label, _ in selected_symbols:
+            if remaining[label] == 0:
+                yield label, ordered(results[label])
+
+        for future in as_completed(futures):
+            label, tf_label, key = futures[future]
+            data = remember(cache, key, future.result())
+            results[label][tf_label] = data
+            remaining[label] -= 1
+            if remaining[label] == 0:
+                yield label, ordered(results[label])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def group_by_screener(selected_symbols):
+    """Grupiše simbole po screeneru: {screener: {"EXCHANGE:SYMBOL": [label, ...]}}."""
+    groups = {}
     for label, config in selected_symbols:
-        symbol = config["map"]["tradingview_ta_v2"]
-        screener = config.get("screener", "forex")
-        exchanges = config.get("exchanges", [])
-        exchange = exchanges[0] if exchanges else "OANDA"
-
-        full_data = {}
-
-        for tf_label, interval in timeframes.items():
-            try:
-                handler = TA_Handler(
-                    symbol=symbol,
-                    screener=screener,
-                    exchange=exchange,
-                    interval=interval
-                )
-
-                analysis = handler.get_analysis()
-                summary = analysis.summary
-                indicators = analysis.indicators
-
-                full_data[tf_label] = {
-                    "summary": summary,
-                    "indicators": indicators
-                }
-
-            except Exception as e:
-                full_data[tf_label] = {"error": str(e)}
-
-        filename = f"{normalize_symbol(label)}_technical_full.json"
-        out_path = os.path.join(output_dir, filename)
-        save_json_data(label.replace("/", ""), full_data, filename=filename)
-        return out_path
+        symbol, screener, exchange = symbol_params(config)
+        tickers = groups.setdefault(screener.lower(), {})
+        tickers.setdefault(f"{exchange}:{symbol}".upper(), []).append(label)
+    return groups
+
+def fetch_batch(screener, interval, tickers):
+    try:
+        with span("tv_get_multiple_analysis", screener=screener, interval=interval, tickers=len(tickers)):
+            analyses = scan(screener, interval, tickers)
+    except Exception as e:
+        return {ticker: {"error": str(e)} for ticker in tickers}
+
+    return {ticker: analysis_data(analyses.get(ticker)) for ticker in tickers}
+
+def iter_ta_data_batch(selected_symbols, max_workers=MAX_WORKERS, cache=TA_CACHE):
+    """Jedan scanner poziv po (screener, timeframe) paru.
+
+    Generator (label, {tf: {summary, indicators}}) kao iter_ta_data; u batch
+    ulaze samo tickeri čiji keš za taj timeframe je istekao.
+    """
+    results = {label: {} for label, _ in selected_symbols}
+    remaining = {label: len(TIMEFRAMES) for label, _ in selected_symbols}
+    if not selected_symbols:
+        return
+
+    groups = group_by_screener(selected_symbols)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {}
+        for tf_label, interval in TIMEFRAMES.items():
+            for screener, tickers in groups.items():
+                stale = []
+                for ticker, labels in tickers.items():
+                    exchange, symbol = ticker.split(":", 1)
+                    key = TACache.make_key(symbol, exchange, screener, interval)
+                    cached = cache.get(key) if cache is not None else None
+                    if cached is None:
+                        stale.append(ticker)
+                        continue
+                    for label in labels:
+                        results[label][tf_label] = cached
+                        remaining[label] -= 1
+                if stale:
+                    futures[pool.submit(fetch_batch, screener, interval, stale)] = (tf_label, screener)
+
+        for label, _ in selected_symbols:
+            if remaining[label] == 0:
+                yield label, ordered(results[label])
+
+        for future in as_completed(futures):
+            tf_label, screener = futures[future]
+            interval = TIMEFRAMES[tf_label]
+            for ticker, data in future.result().items():
+                exchange, symbol = ticker.split(":", 1)
+                data = remember(cache, TACache.make_key(symbol, exchange, screener, interval), data)
+                for label in groups[screener][ticker]:
+                    results[label][tf_label] = data
+                    remaining[label] -= 1
+                    if remaining[label] == 0:
+                        yield label, ordered(results[label])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def save_symbol_data(label, full_data, output_dir):
+    filename = f"{normalize_symbol(label)}_technical_full.json"
+    out_path = save_json_data(label.replace("/", ""), full_data, filename=filename)
+    store_summary(out_path, ta_summary(full_data))
+    TA_MATRIX.update(label, full_data, os.path.getmtime(out_path))
+    return out_path
+
+def stream_ta_analysis(selected_input, output_dir, max_workers=MAX_WORKERS, batch=BATCH_MODE):
+    """Generator (label, full_data, out_path) – svaki simbol se snima i vraća čim stigne."""
+    return stream_ta_symbols(resolve_symbols(selected_input), output_dir, max_workers, batch)
+
+def stream_ta_symbols(selected_symbols, output_dir, max_workers=MAX_WORKERS, batch=BATCH_MODE):
+    """Kao stream_ta_analysis, ali za već razriješene (label, config) parove."""
+    fetch = iter_ta_data_batch if batch else iter_ta_data
+    for label, full_data in fetch(selected_symbols, max_workers=max_workers):
+        out_path = save_symbol_data(label, full_data, output_dir)
+        yield label, full_data, out_path
+
+def run_ta_analysis(selected_input, output_dir, max_workers=MAX_WORKERS, batch=BATCH_MODE, on_symbol=None):
+    """AnalysisResult za prvi izabrani simbol (sažetak u memoriji), ili None.
+
+    on_symbol(label, out_path) se poziva čim je pojedini simbol snimljen.
+    """
+    paths = {}
+    for label, _, out_path in stream_ta_analysis(selected_input, output_dir, max_workers, batch):
+        paths[label] = out_path
+        if on_symbol is not None:
+            on_symbol(label, out_path)
+
+    # 💾 Jedan fajl po simbolu; glavni rezultat je prvi izabrani simbol
+    selected_symbols = resolve_symbols(selected_input)
+    ordered_paths = [paths[label] for label, _ in selected_symbols if label in paths]
+    if not ordered_paths:
+        return None
+    outputs = {path: get_summary(path) for path in ordered_paths}
+    return AnalysisResult(ordered_paths[0], outputs[ordered_paths[0]], outputs)